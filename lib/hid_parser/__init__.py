@@ -84,6 +84,12 @@ class TagLocal:
     DELIMITER = 0b1010
 
 
+def _sign_extend(value: int, size: int) -> int:
+    """Interpret an item value of `size` bytes as signed (6.2.2.7)"""
+    sign = 1 << (size * 8 - 1)
+    return (value ^ sign) - sign
+
+
 def _data_bit_shift(data: Sequence[int], offset: int, length: int) -> Sequence[int]:
     if not length > 0:
         raise ValueError(f"Invalid specified length: {length}")
@@ -575,6 +581,78 @@ class ArrayItem(MainItem):
         return self._usages
 
 
+class ReportExtractor:
+    """
+    Decoder for the fields of one report, compiled from its items
+
+    Calling the extractor with the report data (including the report ID byte for numbered
+    reports) returns a flat tuple of integers, one per field, in the order of `usages`.
+    Variable items give one field each, signed when their logical minimum is negative;
+    array items give one field per slot, holding the value the device put in it, which is an index
+    into the usages of the item offset by its logical minimum.
+    Padding is skipped. Bits are numbered from the least significant bit of the first byte,
+    as in HID 1.11, 5.8.
+    """
+
+    _STRUCT_FORMATS = {8: "b", 16: "h", 32: "i", 64: "q"}
+
+    def __init__(self, report_id: Optional[int], items: List[BaseItem]) -> None:
+        self._start = 0 if report_id is None else 1
+        usages: List[Optional[Usage]] = []
+        fields: List[Tuple[int, int, bool]] = []  # offset, size, signed
+        offset = 0
+        for item in items:
+            if isinstance(item, VariableItem):
+                usages.append(item.usage)
+                signed = item.logical_min < 0
+                fields.append((offset, int(item.size), signed))
+                offset += int(item.size)
+            elif isinstance(item, ArrayItem):
+                for _ in range(item.count):
+                    usages.append(None)
+                    fields.append((offset, int(item.size), False))
+                    offset += int(item.size)
+            else:
+                offset += int(item.size)
+        self._usages = tuple(usages)
+        self._length = (offset + 7) // 8
+
+        self._struct: Optional[struct.Struct] = None
+        if all(field_offset % 8 == 0 and size in self._STRUCT_FORMATS for field_offset, size, _s in fields):
+            fmt = "<"
+            position = 0
+            for field_offset, size, signed in fields:
+                fmt += "x" * ((field_offset - position) // 8)
+                code = self._STRUCT_FORMATS[size]
+                fmt += code if signed else code.upper()
+                position = field_offset + size
+            self._struct = struct.Struct(fmt)
+        # shift, mask, and sign bit (0 for unsigned fields) for the general case
+        self._fields = tuple(
+            (field_offset, (1 << size) - 1, (1 << (size - 1)) if signed else 0) for field_offset, size, signed in fields
+        )
+
+    @property
+    def usages(self) -> Tuple[Optional[Usage], ...]:
+        """The usage of each field, None for array slots"""
+        return self._usages
+
+    @property
+    def size(self) -> BitNumber:
+        return BitNumber(self._length * 8)
+
+    def __call__(self, data: Sequence[int]) -> Tuple[int, ...]:
+        if len(data) < self._start + self._length:
+            raise ValueError(f"Invalid data length: {len(data)} (expecting {self._start + self._length})")
+        if self._struct is not None:
+            return self._struct.unpack_from(bytes(data), self._start)
+        value = int.from_bytes(bytes(data[self._start : self._start + self._length]), byteorder="little")
+        return tuple(((value >> shift) & mask) - (((value >> shift) & sign) << 1) for shift, mask, sign in self._fields)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(size={self.size}, fields={len(self._usages)})"
+
+
 class InvalidReportDescriptor(Exception):
     pass
 
@@ -582,6 +660,61 @@ class InvalidReportDescriptor(Exception):
 # report ID (None for no report ID), item list
 _ITEM_POOL = Dict[Optional[int], List[BaseItem]]
 
+# report ID (None for no report ID), report size in bits
+_SIZE_POOL = Dict[Optional[int], int]
+
+
+def scan_report_sizes(data: Sequence[int]) -> Tuple[_SIZE_POOL, _SIZE_POOL]:
+    """
+    Compute the input and output report sizes (in bits) of a report descriptor in a single pass
+
+    Unlike ReportDescriptor, no items or usages are built and only the tags needed to size
+    reports are interpreted, so this is suitable for quickly probing many descriptors.
+    Only reports that contain at least one item are present in the result.
+    """
+    input_sizes: _SIZE_POOL = {}
+    output_sizes: _SIZE_POOL = {}
+    report_id: Optional[int] = None
+    report_count: Optional[int] = None
+    report_size: Optional[int] = None
+    length = len(data)
+
+    i = 0
+    while i < length:
+        prefix = data[i]
+        size = prefix & 0b00000011
+        if size == 3:  # 6.2.2.2
+            size = 4
+        if i + size >= length:
+            raise InvalidReportDescriptor(f"Invalid size: expecting >={i + 1 + size}, got {length}")
+
+        typ = (prefix & 0b00001100) >> 2
+        if typ == Type.MAIN:
+            tag = prefix >> 4
+            if tag == TagMain.INPUT or tag == TagMain.OUTPUT:
+                if report_count is None:
+                    raise InvalidReportDescriptor("Trying to append an item but no report count given")
+                if report_size is None:
+                    raise InvalidReportDescriptor("Trying to append an item but no report size given")
+                sizes = input_sizes if tag == TagMain.INPUT else output_sizes
+                sizes[report_id] = sizes.get(report_id, 0) + report_count * report_size
+        elif typ == Type.GLOBAL:
+            tag = prefix >> 4
+            if tag == TagGlobal.REPORT_SIZE or tag == TagGlobal.REPORT_COUNT or tag == TagGlobal.REPORT_ID:
+                value = data[i + 1] if size == 1 else int.from_bytes(bytes(data[i + 1 : i + 1 + size]), "little")
+                if tag == TagGlobal.REPORT_SIZE:
+                    report_size = value
+                elif tag == TagGlobal.REPORT_COUNT:
+                    report_count = value
+                else:
+                    if report_id is None and (input_sizes or output_sizes):
+                        raise InvalidReportDescriptor("Tried to set a report ID in a report that does not use them")
+                    report_id = value
+
+        i += size + 1
+
+    return input_sizes, output_sizes
+
 
 class ReportDescriptor:
     def __init__(self, data: Sequence[int]) -> None:
@@ -645,6 +778,18 @@ class ReportDescriptor:
     def get_feature_report_size(self, report_id: Optional[int] = None) -> BitNumber:
         return self._get_report_size(self.get_feature_items(report_id))
 
+    @functools.lru_cache(maxsize=16)  # noqa
+    def compile_input_report(self, report_id: Optional[int] = None) -> ReportExtractor:
+        return ReportExtractor(report_id, self.get_input_items(report_id))
+
+    @functools.lru_cache(maxsize=16)  # noqa
+    def compile_output_report(self, report_id: Optional[int] = None) -> ReportExtractor:
+        return ReportExtractor(report_id, self.get_output_items(report_id))
+
+    @functools.lru_cache(maxsize=16)  # noqa
+    def compile_feature_report(self, report_id: Optional[int] = None) -> ReportExtractor:
+        return ReportExtractor(report_id, self.get_feature_items(report_id))
+
     def _parse_report_items(self, items: List[BaseItem], data: Sequence[int]) -> Dict[Usage, UsageValue]:
         parsed: Dict[Usage, UsageValue] = {}
         for item in items:
@@ -677,7 +822,7 @@ class ReportDescriptor:
     def parse_feature_report(self, data: Sequence[int]) -> Dict[Usage, UsageValue]:
         return self._parse_report(self._feature, data)
 
-    def _iterate_raw(self) -> Iterable[Tuple[int, int, Optional[int]]]:
+    def _iterate_raw(self) -> Iterable[Tuple[int, int, Optional[int], int]]:
         i = 0
         while i < len(self.data):
             prefix = self.data[i]
@@ -705,7 +850,7 @@ class ReportDescriptor:
                     raise ValueError(f"Invalid item size: {size}")
                 data = struct.unpack(f"<{pack_type}", bytes(self.data[i + 1 : i + 1 + size]))[0]
 
-            yield typ, tag, data
+            yield typ, tag, data, size
 
             i += size + 1
 
@@ -796,7 +941,7 @@ class ReportDescriptor:
         glob: Dict[str, Any] = {}
         local: Dict[str, Any] = {}
 
-        for typ, tag, data in self._iterate_raw():
+        for typ, tag, data, size in self._iterate_raw():
             if typ == Type.MAIN:
                 if tag in (TagMain.COLLECTION, TagMain.END_COLLECTION):
                     usages = []
@@ -857,10 +1002,14 @@ class ReportDescriptor:
                     usage_page = data
 
                 elif tag == TagGlobal.LOGICAL_MINIMUM:
-                    glob["logical_min"] = data
+                    glob["logical_min"] = _sign_extend(data, size) if size else 0
 
                 elif tag == TagGlobal.LOGICAL_MAXIMUM:
-                    glob["logical_max"] = data
+                    # as Linux does, the maximum is only signed when the minimum is negative, so that
+                    # the common 0..255 in one byte works
+                    if size and glob.get("logical_min", 0) < 0:
+                        data = _sign_extend(data, size)
+                    glob["logical_max"] = data or 0
 
                 elif tag == TagGlobal.PHYSICAL_MINIMUM:
                     glob["physical_min"] = data
@@ -942,7 +1091,7 @@ class ReportDescriptor:
 
         usage_data: Union[Literal[False], Optional[hid_parser.data._Data]] = False
 
-        for typ, tag, data in self._iterate_raw():
+        for typ, tag, data, _size in self._iterate_raw():
             if typ == Type.MAIN:
                 if tag == TagMain.INPUT:
                     if data is None:
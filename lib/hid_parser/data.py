@@ -44,42 +44,62 @@ class _DataMeta(type):
         _range.append(tuple(0x02, 0x06, ('Data range description', YET_OTHER_DATA_TYPE)))
 
     This metaclass also does some verification to prevent duplicated data.
-    """
 
-    def __new__(mcs, name: str, bases: Tuple[Any], dic: Dict[str, Any]):  # type: ignore  # noqa: C901
-        dic["_single"] = {}
-        dic["_range"] = []
+    The tables are built lazily, on the first lookup of a data attribute, so that
+    importing the module does not pay for usage pages that are never consulted.
+    For large generated tables, data can also be a callable returning the dictionary.
+    """
 
+    def __new__(mcs, name: str, bases: Tuple[Any], dic: Dict[str, Any]):  # type: ignore
         # allow constructing data via a data dictionary as opposed to directly in the object body
         if "data" in dic:
             data = dic.pop("data")
         else:
-            data = dic
+            data = {attr: dic.pop(attr) for attr in list(dic) if not attr.startswith("_") and isinstance(dic[attr], tuple)}
+
+        dic["_data"] = data
+        return super().__new__(mcs, name, bases, dic)
+
+    def __getattr__(cls, attr: str) -> Any:
+        # only called when the normal lookup fails, ie. before the tables are built
+        if attr.startswith("__") or "_single" in cls.__dict__:
+            raise AttributeError(f"type object '{cls.__name__}' has no attribute '{attr}'")
+        cls._build()
+        return getattr(cls, attr)
+
+    def _build(cls) -> None:  # noqa: C901
+        data = cls.__dict__["_data"]
+        if callable(data):
+            data = data()
+
+        single: Dict[int, Any] = {}
+        ranges: List[Tuple[int, int, Any]] = []
 
         for attr in data:
             if not attr.startswith("_") and isinstance(data[attr], tuple):
-                if len(data[attr]) == 2 or len(data[attr]) == 4:  # missing sub data
-                    data[attr] = data[attr] + (None,)
+                value = data[attr]
+                if len(value) == 2 or len(value) == 4:  # missing sub data
+                    value = value + (None,)
 
-                if len(data[attr]) == 3:  # single
-                    num, desc, sub = data[attr]
+                if len(value) == 3:  # single
+                    num, desc, sub = value
 
                     if not isinstance(num, int):
                         raise TypeError(f"First element of '{attr}' should be an int")
                     if not isinstance(desc, str):
                         raise TypeError(f"Second element of '{attr}' should be a string")
 
-                    if num in dic["_single"]:
+                    if num in single:
                         raise ValueError(f"Duplicated value in '{attr}' ({num})")
 
-                    for nmin, nmax, _ in dic["_range"]:
+                    for nmin, nmax, _ in ranges:
                         if nmin <= num <= nmax:
                             raise ValueError(f"Duplicated value in '{attr}' ({num})")
 
-                    dic[attr] = num
-                    dic["_single"][num] = desc, sub
-                elif len(data[attr]) == 5:  # range
-                    nmin, el, nmax, desc, sub = data[attr]
+                    setattr(cls, attr, num)
+                    single[num] = desc, sub
+                elif len(value) == 5:  # range
+                    nmin, el, nmax, desc, sub = value
 
                     if not el == Ellipsis:
                         raise TypeError(f"Second element of '{attr}' should be an ellipsis (...)")
@@ -90,17 +110,18 @@ class _DataMeta(type):
                     if not isinstance(desc, str):
                         raise TypeError(f"Fourth element of '{attr}' should be a string")
 
-                    for num in dic["_single"]:
+                    for num in single:
                         if nmin <= num <= nmax:
                             raise ValueError(f"Duplicated value in '{attr}' ({num})")
 
-                    dic[attr] = range(nmin, nmax + 1)
-                    dic["_range"].append((nmin, nmax, (desc, sub)))
+                    setattr(cls, attr, range(nmin, nmax + 1))
+                    ranges.append((nmin, nmax, (desc, sub)))
 
                 else:
                     raise ValueError(f"Invalid field: {attr}")
 
-        return super().__new__(mcs, name, bases, dic)
+        cls._range = ranges
+        cls._single = single
 
 
 class _Data(metaclass=_DataMeta):
@@ -113,6 +134,9 @@ class _Data(metaclass=_DataMeta):
     _single: Dict[int, _DATA]
     _range: List[Tuple[int, int, _DATA]]
 
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(type(self), attr)
+
     @classmethod
     def _get_data(cls, num: Optional[int]) -> _DATA:
         if num is None:
@@ -583,15 +607,16 @@ class Button(_Data):
         UsageTypes.OSC,
     )
 
-    data = {
-        "NO_BUTTON": (0x0000, "Button 1 (primary/trigger)", _USAGE_TYPES),
-        "BUTTON_1": (0x0001, "Button 1 (primary/trigger)", _USAGE_TYPES),
-        "BUTTON_2": (0x0002, "Button 2 (secondary)", _USAGE_TYPES),
-        "BUTTON_3": (0x0003, "Button 3 (tertiary)", _USAGE_TYPES),
-    }
-
-    for _i in range(0x0004, 0xFFFF):
-        data[f"BUTTON_{_i}"] = _i, f"Button {_i}", _USAGE_TYPES
+    def data():  # generated on first lookup, this page has ~64k usages
+        data = {
+            "NO_BUTTON": (0x0000, "Button 1 (primary/trigger)", Button._USAGE_TYPES),
+            "BUTTON_1": (0x0001, "Button 1 (primary/trigger)", Button._USAGE_TYPES),
+            "BUTTON_2": (0x0002, "Button 2 (secondary)", Button._USAGE_TYPES),
+            "BUTTON_3": (0x0003, "Button 3 (tertiary)", Button._USAGE_TYPES),
+        }
+        for i in range(0x0004, 0xFFFF):
+            data[f"BUTTON_{i}"] = i, f"Button {i}", Button._USAGE_TYPES
+        return data
 
 
 class Consumer(_Data):
@@ -28,8 +28,8 @@ from __future__ import annotations
 import errno
 import logging
 import os
+import threading
 import typing
-import warnings
 
 
 # the tuple object we'll expose when enumerating devices
@@ -55,6 +55,12 @@ fileopen = open
 ACTION_ADD = "add"
 ACTION_REMOVE = "remove"
 
+# udev events for the same device node that arrive closer together than this (in seconds) are coalesced
+HOTPLUG_DEBOUNCE = 0.25
+
+# longest time (in seconds) to wait for udev to set up the permissions of a new device node
+_UDEV_TIMEOUT = 2.0
+
 #
 # exposed API
 # docstrings mostly copied from hidapi.h
@@ -99,17 +105,15 @@ def _match(action: str, device, filter_func: typing.Callable[[int, int, int, boo
         return  # these are devices connected through a receiver so don't pick them up here
 
     try:  # if report descriptor does not indicate HID++ capabilities then this device is not of interest to Solaar
-        from hid_parser import ReportDescriptor
+        from hid_parser import scan_report_sizes
 
         hidpp_short = hidpp_long = False
         devfile = "/sys" + hid_device.properties.get("DEVPATH") + "/report_descriptor"
         with fileopen(devfile, "rb") as fd:
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                rd = ReportDescriptor(fd.read())
-            hidpp_short = 0x10 in rd.input_report_ids and 6 * 8 == int(rd.get_input_report_size(0x10))
+            input_sizes, _output_sizes = scan_report_sizes(fd.read())  # only the sizes are needed, not a full parse
+            hidpp_short = 6 * 8 == input_sizes.get(0x10)
             # and _Usage(0xFF00, 0x0001) in rd.get_input_items(0x10)[0].usages  # be more permissive
-            hidpp_long = 0x11 in rd.input_report_ids and 19 * 8 == int(rd.get_input_report_size(0x11))
+            hidpp_long = 19 * 8 == input_sizes.get(0x11)
             # and _Usage(0xFF00, 0x0002) in rd.get_input_items(0x11)[0].usages  # be more permissive
         if not hidpp_short and not hidpp_long:
             return
@@ -229,9 +233,87 @@ def find_paired_node_wpid(receiver_path: str, index: int):
     return None
 
 
+def _removed(path: str) -> DeviceInfo:
+    """What is known about a device node that has gone away."""
+    return DeviceInfo(
+        path=path,
+        bus_id=None,
+        vendor_id=None,
+        product_id=None,
+        interface=None,
+        driver=None,
+        manufacturer=None,
+        product=None,
+        serial=None,
+        release=None,
+        isDevice=None,
+        hidpp_short=None,
+        hidpp_long=None,
+    )
+
+
+class _HotplugWorker(threading.Thread):
+    """Matches udev hotplug events off the GLib main thread.
+
+    Bursts of events (e.g., when docking or resuming) are coalesced per device node.
+    Only the last event for a node is processed, once the node has been quiet for the debounce interval,
+    and only device additions that match are delivered to the callback on the GLib thread.
+    """
+
+    def __init__(self, glib: GLib, callback: Callable, filter_func: Callable, debounce: float = HOTPLUG_DEBOUNCE):
+        super().__init__(name=self.__class__.__name__)
+        self.daemon = True
+        self.glib = glib
+        self.callback = callback
+        self.filter_func = filter_func
+        self.debounce = debounce
+        self._pending = {}  # device node => (deadline, action, device)
+        self._condition = threading.Condition()
+
+    def push(self, action: str, device) -> None:
+        """Record an event, replacing any pending event for the same device node."""
+        node = device.device_node or device.sys_path
+        with self._condition:
+            self._pending[node] = (time() + self.debounce, action, device)
+            self._condition.notify()
+
+    def take_due(self, now: float) -> list:
+        """Remove and return the pending events whose nodes have been quiet for the debounce interval."""
+        with self._condition:
+            due = [node for node, (deadline, _a, _d) in self._pending.items() if deadline <= now]
+            return [self._pending.pop(node)[1:] for node in due]
+
+    def process(self, action: str, device) -> None:
+        if action == ACTION_ADD:
+            d_info = _match(action, device, self.filter_func)
+            if d_info:
+                self.glib.idle_add(self.callback, action, d_info)
+        elif action == ACTION_REMOVE:
+            # the device is gone so it can't be matched, but whatever was opened on its node has to be let go
+            if device.device_node:
+                self.glib.idle_add(self.callback, action, _removed(device.device_node))
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                wait = min(deadline for deadline, _a, _d in self._pending.values()) - time()
+                if wait > 0:
+                    self._condition.wait(wait)
+            for action, device in self.take_due(time()):
+                try:
+                    self.process(action, device)
+                except Exception:
+                    logger.exception("processing udev event %s %s", action, device)
+
+
 def monitor_glib(glib: GLib, callback: Callable, filter_func: Callable):
     """Monitor GLib.
 
+    Udev events are only received on the GLib thread; matching them against the filter
+    (which reads the report descriptor) is done by a worker thread.
+
     Parameters
     ----------
     glib
@@ -240,6 +322,8 @@ def monitor_glib(glib: GLib, callback: Callable, filter_func: Callable):
     c = pyudev.Context()
     m = pyudev.Monitor.from_netlink(c)
     m.filter_by(subsystem="hidraw")
+    worker = _HotplugWorker(glib, callback, filter_func)
+    worker.start()
 
     def _process_udev_event(monitor, condition, cb, filter_func):
         if condition == glib.IO_IN:
@@ -247,13 +331,8 @@ def monitor_glib(glib: GLib, callback: Callable, filter_func: Callable):
             if event:
                 action, device = event
                 # print ("***", action, device)
-                if action == ACTION_ADD:
-                    d_info = _match(action, device, filter_func)
-                    if d_info:
-                        glib.idle_add(cb, action, d_info)
-                elif action == ACTION_REMOVE:
-                    # the GLib notification does _not_ match!
-                    pass
+                if action in (ACTION_ADD, ACTION_REMOVE):
+                    worker.push(action, device)
         return True
 
     try:
@@ -313,17 +392,39 @@ def open_path(device_path):
     assert device_path.startswith("/dev/hidraw")
 
     logger.info("OPEN PATH %s", device_path)
-    retrycount = 0
-    while retrycount < 3:
-        retrycount += 1
+    waited = False
+    while True:
         try:
             return os.open(device_path, os.O_RDWR | os.O_SYNC)
         except OSError as e:
             logger.info("OPEN PATH FAILED %s ERROR %s %s", device_path, e.errno, e)
-            if e.errno == errno.EACCES:
-                sleep(0.1)
-            else:
+            if e.errno != errno.EACCES:
                 raise e
+            if waited or not _wait_for_udev(device_path):  # the permissions are not going to change
+                return None
+            waited = True
+
+
+def _wait_for_udev(device_path, timeout=_UDEV_TIMEOUT):
+    """Wait until udev has processed a new device node, which is when its permissions are set up.
+
+    :returns: whether udev has processed the node since it was found, so opening it again might work.
+    """
+    context = pyudev.Context()
+    monitor = pyudev.Monitor.from_netlink(context)
+    monitor.filter_by(subsystem="hidraw")
+    monitor.start()
+    try:
+        if pyudev.Devices.from_device_file(context, device_path).is_initialized:
+            return True  # udev may have finished after the open failed, so try once more
+    except Exception:  # the node has gone away
+        return False
+    deadline = time() + timeout
+    while time() < deadline:
+        event = monitor.poll(timeout=deadline - time())
+        if event is not None and event.device_node == device_path:
+            return True
+    return False
 
 
 def close(device_handle) -> None:
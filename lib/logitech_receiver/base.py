@@ -96,6 +96,8 @@ HIDPP_SHORT_MESSAGE_ID = 0x10
 HIDPP_LONG_MESSAGE_ID = 0x11
 DJ_MESSAGE_ID = 0x20
 
+KERNEL_SW_ID = 0x01  # software ID of requests from the Linux HID++ driver, whose replies Solaar also sees
+
 
 """Default timeout on read (in seconds)."""
 DEFAULT_TIMEOUT = 4
@@ -105,6 +107,8 @@ _RECEIVER_REQUEST_TIMEOUT = 0.9
 _DEVICE_REQUEST_TIMEOUT = DEFAULT_TIMEOUT
 # when pinging, be extra patient (no longer)
 _PING_TIMEOUT = DEFAULT_TIMEOUT
+# how many requests request_many keeps in flight, well below the 14 available software IDs
+_PIPELINE_WINDOW = 4
 
 hidapi = typing.cast(HIDProtocol, hidapi)
 
@@ -148,6 +152,11 @@ for _ignore, d in descriptors.DEVICES.items():
     if d.btid:
         KNOWN_DEVICE_IDS.append(_bluetooth_device(d.btid))
 
+# known devices by (bus, vendor, product), so that filtering each HID node is a single lookup
+_KNOWN_DEVICES_INDEX = {}
+for _record in KNOWN_DEVICE_IDS:
+    _KNOWN_DEVICES_INDEX.setdefault((_record["bus_id"], _record["vendor_id"], _record["product_id"]), _record)
+
 
 def product_information(usb_id: int) -> dict[str, Any]:
     """Returns hardcoded information from USB receiver."""
@@ -181,9 +190,7 @@ def filter_products_of_interest(
 
 
 def get_known_device_info(bus_id: int, vendor_id: int, product_id: int) -> dict[str, Any]:
-    for recv in KNOWN_DEVICE_IDS:
-        if _match_device(recv, bus_id, vendor_id, product_id):
-            return recv
+    return _KNOWN_DEVICES_INDEX.get((bus_id, vendor_id, product_id))
 
 
 def get_unknown_hid_device_info(bus_id: int, vendor_id: int, product_id: int) -> dict[str, Any]:
@@ -285,6 +292,8 @@ def open():
 def close(handle):
     """Closes a HID device handle."""
     if handle:
+        with request_lock:
+            handles_lock.pop(handle, None)
         try:
             if isinstance(handle, int):
                 hidapi.close(handle)
@@ -445,6 +454,9 @@ def make_notification(report_id: int, devnumber: int, data: bytes) -> HIDPPNotif
         or
         # HID++ 2.0 feature notifications have the SoftwareID 0
         (address & 0x0F == 0x00)
+        or
+        # replies to the Linux HID++ driver show what it did to the device
+        (report_id in (HIDPP_SHORT_MESSAGE_ID, HIDPP_LONG_MESSAGE_ID) and address & 0x0F == KERNEL_SW_ID)
     ):  # noqa: E129
         return HIDPPNotification(report_id, devnumber, sub_id, address, data[2:])
     return None
@@ -614,6 +626,126 @@ def request(
         # raise DeviceUnreachable(number=devnumber, request=request_id)
 
 
+def request_many(
+    handle,
+    devnumber,
+    requests,
+    long_message: bool = False,
+    protocol: float = 1.0,
+    window: int = _PIPELINE_WINDOW,
+):
+    """Makes several calls to a device, writing the next ones before the replies to the previous ones arrive.
+    Replies are matched to their requests by SubId/feature index, address/function and software ID,
+    so up to `window` requests are in flight at the same time.
+    A HID++ 1.0 error reply doesn't say which register parameter it is for, so register requests
+    with the same SubId and address, such as the 0x83B5 reads of the receiver's pairing information,
+    are made one at a time.
+    Requests that didn't get a reply in the pipeline are retried one at a time.
+    :param handle: an open UR handle.
+    :param devnumber: attached device number.
+    :param requests: a sequence of (request_id, *params) tuples.
+    :returns: a list with the reply data for each request, ``None`` for requests that failed.
+    :raises FeatureCallError: once all requests are done, if a HID++ 2.0 feature call returned an error,
+        as ``request`` does; the replies to all the requests are in its ``replies``.
+    """
+    results = [None] * len(requests)
+    retries = []
+    feature_error = None
+    with acquire_timeout(handle_lock(handle), handle, 10.0):
+        timeout = _RECEIVER_REQUEST_TIMEOUT if devnumber == 0xFF else _DEVICE_REQUEST_TIMEOUT
+        ihandle = int(handle)
+        notifications_hook = getattr(handle, "notifications_hook", None)
+        try:
+            _read_input_buffer(handle, ihandle, notifications_hook)
+        except exceptions.NoReceiver:
+            logger.warning("device or receiver disconnected")
+            return results
+
+        pending = {}  # position of request => (reply prefix, request data), in the order they were written
+        position = 0
+        request_started = time()
+        while position < len(requests) or pending:
+            while position < len(requests) and len(pending) < window:
+                request_id, *params = requests[position]
+                if request_id >= 0x8000 and any(data[:2] == struct.pack("!H", request_id) for _, data in pending.values()):
+                    break  # wait for the earlier request so that an error reply can only be for one of them
+                if (devnumber != 0xFF or protocol >= 2.0) and request_id < 0x8000:
+                    request_id = (request_id & 0xFFF0) | _get_next_sw_id()
+                params = b"".join(struct.pack("B", p) if isinstance(p, int) else p for p in params)
+                request_data = struct.pack("!H", request_id) + params
+                # these replies have to match the first parameter as well
+                prefix = request_data[:3] if request_id == 0x83B5 or request_id == 0x81F1 else request_data[:2]
+                pending[position] = prefix, request_data
+                write(ihandle, devnumber, request_data, long_message)
+                position += 1
+
+            reply = _read(handle, timeout)
+            if reply:
+                report_id, reply_devnumber, reply_data = reply
+                matched = None
+                if reply_devnumber == devnumber or reply_devnumber == devnumber ^ 0xFF:  # BT device returning 0x00
+                    feature_call_error = reply_data[:1] == b"\xff"
+                    error = feature_call_error or report_id == HIDPP_SHORT_MESSAGE_ID and reply_data[:1] == b"\x8f"
+                    for p, (prefix, request_data) in pending.items():  # at most one request can match an error
+                        if error and reply_data[1:3] == request_data[:2]:
+                            code = ord(reply_data[3:4])
+                            request_id = struct.unpack("!H", request_data[:2])[0]
+                            if feature_call_error:
+                                # a HID++ 2.0 feature call returned with an error
+                                logger.error(
+                                    "(%s) device %d error on feature request {%04X}: %d = %s",
+                                    handle,
+                                    devnumber,
+                                    request_id,
+                                    code,
+                                    Hidpp20ErrorCode(code),
+                                )
+                                if feature_error is None:
+                                    feature_error = exceptions.FeatureCallError(
+                                        number=devnumber, request=request_id, error=code, params=request_data[2:]
+                                    )
+                            elif logger.isEnabledFor(logging.DEBUG):
+                                logger.debug(
+                                    "(%s) device 0x%02X error on request {%04X}: %d = %s",
+                                    handle,
+                                    devnumber,
+                                    request_id,
+                                    code,
+                                    Hidpp10ErrorCode(code),
+                                )
+                            matched = p
+                            break
+                        if not error and reply_data[: len(prefix)] == prefix:
+                            results[p] = reply_data[2:]
+                            matched = p
+                            break
+                if matched is not None:
+                    del pending[matched]
+                    request_started = time()
+                    continue
+                if notifications_hook:
+                    n = make_notification(report_id, reply_devnumber, reply_data)
+                    if n:
+                        notifications_hook(n)
+
+            # be extra patient on long register reads, as request is
+            patience = timeout * 2 if any(data[:1] == b"\x83" for _, data in pending.values()) else timeout
+            if time() - request_started >= patience:
+                logger.warning("timeout on device %d, retrying %d pipelined requests", devnumber, len(pending))
+                retries = list(pending)
+                break
+
+    for p in retries:
+        try:
+            results[p] = request(handle, devnumber, *requests[p], long_message=long_message, protocol=protocol)
+        except exceptions.FeatureCallError as e:
+            feature_error = feature_error or e
+    if feature_error is not None:
+        feature_error.replies = results
+        raise feature_error
+    return results
+
+
 def ping(handle, devnumber, long_message: bool = False):
     """Check if a device is connected to the receiver.
     :returns: The HID protocol supported by the device, as a floating point number, if the device is active.
@@ -22,9 +22,11 @@ import typing
 
 from enum import Flag
 from enum import IntEnum
+from typing import Any
 from typing import Generator
 from typing import Iterable
 from typing import Optional
+from typing import Protocol
 from typing import Union
 
 import yaml
@@ -674,3 +676,44 @@ class Notification(IntEnum):
 class BusID(IntEnum):
     USB = 0x03
     BLUETOOTH = 0x05
+
+
+class DeviceCache(Protocol):
+    """Where information read from devices is remembered between runs, such as solaar.cache."""
+
+    def device_key(self, device) -> Optional[str]:
+        ...
+
+    def get(self, section: str, key: Optional[str]) -> Any:
+        ...
+
+    def put(self, section: str, key: Optional[str], value: Any) -> None:
+        ...
+
+    def remove(self, section: str, key: Optional[str]) -> None:
+        ...
+
+    def forget(self, key: Optional[str]) -> None:
+        ...
+
+
+class NoDeviceCache:
+    """Remembers nothing, as no device has a key."""
+
+    def device_key(self, device):
+        return None
+
+    def get(self, section, key):
+        return None
+
+    def put(self, section, key, value):
+        pass
+
+    def remove(self, section, key):
+        pass
+
+    def forget(self, key):
+        pass
+
+
+device_cache: DeviceCache = NoDeviceCache()  # set by applications that remember information read from devices
@@ -55,6 +55,8 @@ class _DeviceDescriptor:
 
 DEVICES_WPID = {}
 DEVICES = {}
+DEVICES_USBID = {}
+DEVICES_BTID = {}
 
 
 def _D(
@@ -121,6 +123,10 @@ def _D(
     assert codename not in DEVICES, f"duplicate codename in device descriptors: {DEVICES[codename]}"
     if codename:
         DEVICES[codename] = device_descriptor
+        if usbid:
+            DEVICES_USBID[usbid] = device_descriptor
+        if btid:
+            DEVICES_BTID[btid] = device_descriptor
 
     if wpid:
         for w in wpid if isinstance(wpid, tuple) else (wpid,):
@@ -139,15 +145,13 @@ def get_codename(codename):
 def get_usbid(usbid):
     if isinstance(usbid, str):
         usbid = int(usbid, 16)
-    found = next((x for x in DEVICES.values() if x.usbid == usbid), None)
-    return found
+    return DEVICES_USBID.get(usbid)
 
 
 def get_btid(btid):
     if isinstance(btid, str):
         btid = int(btid, 16)
-    found = next((x for x in DEVICES.values() if x.btid == btid), None)
-    return found
+    return DEVICES_BTID.get(btid)
 
 
 # Some HID++1.0 registers and HID++2.0 features can be discovered at run-time,
@@ -20,8 +20,7 @@ from __future__ import annotations
 import errno
 import logging
 import threading
-import time
-import typing
+import weakref
 
 from typing import Callable
 from typing import Optional
@@ -29,26 +28,30 @@ from typing import Protocol
 
 from solaar import configuration
 
+from . import common
 from . import descriptors
 from . import exceptions
 from . import hidpp10
 from . import hidpp10_constants
 from . import hidpp20
+from . import presence
 from . import settings
 from . import settings_templates
 from .common import Alert
 from .common import Battery
+from .common import FirmwareInfo
+from .common import FirmwareKind
 from .hidpp10_constants import NotificationFlag
 from .hidpp20_constants import SupportedFeature
 
-if typing.TYPE_CHECKING:
-    from logitech_receiver import common
-
 logger = logging.getLogger(__name__)
 
 _hidpp10 = hidpp10.Hidpp10()
 _hidpp20 = hidpp20.Hidpp20()
 
+_SNAPSHOT_VERSION = 2  # change when the contents of capability snapshots change
+_CONFIGURED = 0x11  # configuration cookie set once settings are applied, the device clears it when it loses them
+
 
 class LowLevelInterface(Protocol):
     def open_path(self, path) -> int:
@@ -63,6 +66,9 @@ class LowLevelInterface(Protocol):
     def request(self, handle, devnumber, request_id, *params, **kwargs):
         ...
 
+    def request_many(self, handle, devnumber, requests, **kwargs):
+        ...
+
     def close(self, handle, *args, **kwargs) -> bool:
         ...
 
@@ -93,8 +99,136 @@ def create_device(low_level: LowLevelInterface, device_info, setting_callback=No
         raise e
 
 
+class DeviceRegistry:
+    """The open devices, held by weak references and indexed by serial number, unit ID, name and codename,
+    so that rules and the listener can find them without scanning them all."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refs = {}  # id of device => weak reference to it, in registration order
+        self._keys = {}  # id of device => identifiers of the device
+        self._index = {}  # identifier => ids of devices with that identifier
+        self._gone = []  # ids of devices that were closed or collected, removed on the next access
+
+    def add(self, device):
+        key = id(device)
+        with self._lock:
+            self._prune()
+            if key not in self._refs:
+                self._refs[key] = weakref.ref(device, lambda _ref, key=key: self._gone.append(key))
+                self._keys[key] = set()
+        self.index(device, device._serial, device._unitId, device._name, device._codename)
+
+    def index(self, device, *identifiers):
+        """Add identifiers to a registered device."""
+        with self._lock:
+            keys = self._keys.get(id(device))
+            if keys is None:
+                return
+            for identifier in identifiers:
+                if identifier and identifier not in keys:
+                    keys.add(identifier)
+                    self._index.setdefault(identifier, []).append(id(device))
+
+    def remove(self, device):
+        # may be called from __del__, so don't take the lock here
+        self._gone.append(id(device))
+
+    def _prune(self):
+        while self._gone:
+            key = self._gone.pop()
+            self._refs.pop(key, None)
+            for identifier in self._keys.pop(key, ()):
+                keys = self._index[identifier]
+                keys.remove(key)
+                if not keys:
+                    del self._index[identifier]
+
+    def _lookup(self, identifier):
+        with self._lock:
+            self._prune()
+            refs = [self._refs[key] for key in self._index.get(identifier, ())]
+        return [device for device in (ref() for ref in refs) if device is not None]
+
+    def find(self, id):
+        for device in self._lookup(id):
+            if device.online and (device.unitId == id or device.serial == id or device.name == id or device.codename == id):
+                return device
+        for device in self:  # identifiers not known yet, getting them indexes them
+            if device.online and (device.unitId == id or device.serial == id or device.name == id or device.codename == id):
+                return device
+
+    def __iter__(self):
+        with self._lock:
+            self._prune()
+            refs = list(self._refs.values())
+        return (device for device in (ref() for ref in refs) if device is not None)
+
+    def __len__(self):
+        with self._lock:
+            self._prune()
+            return len(self._refs)
+
+
 class Device:
-    instances = []
+    __slots__ = (
+        "__weakref__",
+        "low_level",
+        "number",
+        "_online",
+        "_heard",
+        "descriptor",
+        "isDevice",
+        "may_unpair",
+        "receiver",
+        "handle",
+        "path",
+        "product_id",
+        "hidpp_short",
+        "hidpp_long",
+        "bluetooth",
+        "hid_serial",
+        "setting_callback",
+        "status_callback",
+        "wpid",
+        "_kind",
+        "_serial",
+        "_polling_rate",
+        "_power_switch",
+        "_name",
+        "_codename",
+        "_protocol",
+        "_unitId",
+        "_modelId",
+        "_tid_map",
+        "_persister",
+        "_snapshot",
+        "_snapshot_checked",
+        "_led_effects",
+        "_firmware",
+        "_keys",
+        "_remap_keys",
+        "_gestures",
+        "_force_buttons",
+        "_profiles",
+        "_backlight",
+        "_settings",
+        "_applied_settings",
+        "registers",
+        "notification_flags",
+        "battery_info",
+        "link_encrypted",
+        "_active",
+        "present",
+        "_feature_settings_checked",
+        "_gestures_lock",
+        "_settings_lock",
+        "_persister_lock",
+        "_notification_handlers",
+        "cleanups",
+        "features",
+    )
+    registry = DeviceRegistry()
     read_register: Callable = hidpp10.read_register
     write_register: Callable = hidpp10.write_register
 
@@ -114,7 +248,10 @@ class Device:
             assert 0 < number <= 15  # some receivers have devices past their max # of devices
         self.low_level = low_level
         self.number = number  # will be None at this point for directly connected devices
-        self.online = online  # is the device online? - gates many atempts to contact the device
+        self._online = online  # is the device online? - gates many atempts to contact the device
+        self._heard = None  # when something was last heard from or about the device, see presence
+        if online is not None:
+            presence.heard(self)
         self.descriptor = None
         self.isDevice = True  # some devices act as receiver so we need a property to distinguish them
         self.may_unpair = False
@@ -140,8 +277,12 @@ class Device:
         self._modelId = None  # model id (contains identifiers for the transports of the device)
         self._tid_map = None  # map from transports to product identifiers
         self._persister = None  # persister holds settings
+        # capabilities read from the device earlier
+        self._snapshot = common.device_cache.get("devices", common.device_cache.device_key(self))
+        self._snapshot_checked = False
         self._led_effects = self._firmware = self._keys = self._remap_keys = self._gestures = self._force_buttons = None
         self._profiles = self._backlight = self._settings = None
+        self._applied_settings = None  # fingerprint of the settings last applied, see settings.fingerprint
         self.registers = []
         self.notification_flags = None
         self.battery_info = None
@@ -159,14 +300,10 @@ class Device:
         if not self.path:
             self.path = self.low_level.find_paired_node(receiver.path, number, 1) if receiver else None
         if not self.handle:
-            try:
+            try:  # open_path waits for udev to finish setting up a new node, so there is no point in trying again
                 self.handle = self.low_level.open_path(self.path) if self.path else None
-            except Exception:  # maybe the device wasn't set up
-                try:
-                    time.sleep(1)
-                    self.handle = self.low_level.open_path(self.path) if self.path else None
-                except Exception:  # give up
-                    self.handle = None  # should this give up completely?
+            except Exception:
+                self.handle = None  # requests then go through the receiver, if there is one
 
         if receiver:
             if not self.wpid:
@@ -205,13 +342,40 @@ class Device:
         else:
             self.features = hidpp20.FeaturesArray(self)  # may be a 2.0 device; if not, it will fix itself later
 
-        Device.instances.append(self)
+        Device.registry.add(self)
 
     def find(self, id):  # find a device by serial number or unit ID or name or codename
         assert id, "need id to find a device"
-        for device in Device.instances:
-            if device.online and (device.unitId == id or device.serial == id or device.name == id or device.codename == id):
-                return device
+        return Device.registry.find(id)
+
+    def _from_snapshot(self, name):
+        """Get a value from the capability snapshot, the first time making sure the firmware is still the same."""
+        if self._snapshot and not self._snapshot_checked:
+            self._snapshot_checked = True
+            fingerprint = self.features.fingerprint() if self.features else None
+            if self._snapshot.get("version") != _SNAPSHOT_VERSION or fingerprint != self._snapshot.get("fingerprint"):
+                self._snapshot = None
+        return self._snapshot.get(name) if self._snapshot else None
+
+    def _to_snapshot(self, name, value):
+        key = common.device_cache.device_key(self)
+        fingerprint = self.features.fingerprint() if key and self.features else None
+        if fingerprint:
+            if not self._snapshot or self._snapshot.get("fingerprint") != fingerprint:
+                self._snapshot = {"version": _SNAPSHOT_VERSION, "fingerprint": fingerprint}
+            self._snapshot_checked = True
+            if self._snapshot.get(name) != value:
+                self._snapshot[name] = value
+                common.device_cache.put("devices", key, self._snapshot)
+
+    @property
+    def online(self):
+        return self._online
+
+    @online.setter
+    def online(self, online):
+        was_online, self._online = self._online, online
+        presence.update(self, online, was_online)
 
     @property
     def protocol(self):
@@ -223,8 +387,10 @@ class Device:
     def codename(self):
         if not self._codename:
             if self.online and self.protocol >= 2.0:
-                self._codename = _hidpp20.get_friendly_name(self)
-                if not self._codename:
+                self._codename = self._from_snapshot("codename") or _hidpp20.get_friendly_name(self)
+                if self._codename:
+                    self._to_snapshot("codename", self._codename)
+                else:
                     self._codename = self.name.split(" ", 1)[0] if self.name else None
             if not self._codename and self.receiver:
                 codename = self.receiver.device_codename(self.number)
@@ -232,19 +398,25 @@ class Device:
                     self._codename = codename
                 elif self.protocol < 2.0:
                     self._codename = "? (%s)" % (self.wpid or self.product_id)
+            Device.registry.index(self, self._codename)
         return self._codename or f"?? ({self.wpid or self.product_id})"
 
     @property
     def name(self):
         if not self._name:
             if self.online and self.protocol >= 2.0:
-                self._name = _hidpp20.get_name(self)
+                self._name = self._from_snapshot("name") or _hidpp20.get_name(self)
+                if self._name:
+                    self._to_snapshot("name", self._name)
+                    Device.registry.index(self, self._name)
         return self._name or self._codename or f"Unknown device {self.wpid or self.product_id}"
 
     def get_ids(self):
-        ids = _hidpp20.get_ids(self)
+        ids = self._from_snapshot("ids") or _hidpp20.get_ids(self)
         if ids:
+            self._to_snapshot("ids", list(ids))
             self._unitId, self._modelId, self._tid_map = ids
+            Device.registry.index(self, self._unitId)
             if logger.isEnabledFor(logging.INFO) and self._serial and self._serial != self._unitId:
                 logger.info("%s: unitId %s does not match serial %s", self, self._unitId, self._serial)
 
@@ -269,14 +441,29 @@ class Device:
     @property
     def kind(self):
         if not self._kind and self.online and self.protocol >= 2.0:
-            self._kind = _hidpp20.get_kind(self)
+            kind = self._from_snapshot("kind")
+            self._kind = hidpp10_constants.DEVICE_KIND[kind] if kind is not None else _hidpp20.get_kind(self)
+            if self._kind is not None:
+                self._to_snapshot("kind", int(self._kind))
         return self._kind or "?"
 
     @property
     def firmware(self) -> tuple[common.FirmwareInfo]:
         if self._firmware is None and self.online:
             if self.protocol >= 2.0:
-                self._firmware = _hidpp20.get_firmware(self)
+                firmware = self._from_snapshot("firmware")
+                if firmware is not None:
+                    self._firmware = tuple(
+                        FirmwareInfo(FirmwareKind(k), n, v, bytes.fromhex(e) if e is not None else None)
+                        for k, n, v, e in firmware
+                    )
+                else:
+                    self._firmware = _hidpp20.get_firmware(self)
+                    if self._firmware:
+                        firmware = [
+                            [int(f.kind), f.name, f.version, f.extras.hex() if f.extras else None] for f in self._firmware
+                        ]
+                        self._to_snapshot("firmware", firmware)
             else:
                 self._firmware = _hidpp10.get_firmware(self)
         return self._firmware or ()
@@ -303,10 +490,18 @@ class Device:
     @property
     def led_effects(self):
         if not self._led_effects and self.online and self.protocol >= 2.0:
+            effects_class = None
             if SupportedFeature.COLOR_LED_EFFECTS in self.features:
-                self._led_effects = hidpp20.LEDEffectsInfo(self)
+                effects_class = hidpp20.LEDEffectsInfo
             elif SupportedFeature.RGB_EFFECTS in self.features:
-                self._led_effects = hidpp20.RGBEffectsInfo(self)
+                effects_class = hidpp20.RGBEffectsInfo
+            if effects_class:
+                led_effects = self._from_snapshot("led_effects")
+                if led_effects is not None:
+                    self._led_effects = effects_class.from_snapshot(self, led_effects)
+                else:
+                    self._led_effects = effects_class(self)
+                    self._to_snapshot("led_effects", self._led_effects.to_snapshot())
         return self._led_effects
 
     @property
@@ -314,6 +509,13 @@ class Device:
         if not self._keys:
             if self.online and self.protocol >= 2.0:
                 self._keys = _hidpp20.get_keys(self) or ()
+                snapshot = self._from_snapshot("keys") if self._keys else None
+                if snapshot is not None and len(snapshot) == len(self._keys):
+                    self._keys.load_snapshot(snapshot)
+                elif self._keys and common.device_cache.device_key(self):  # reading all the keys is worth it
+                    snapshot = self._keys.to_snapshot()
+                    if snapshot is not None:
+                        self._to_snapshot("keys", snapshot)
         return self._keys
 
     @property
@@ -453,14 +655,23 @@ class Device:
                     or push
                     and (not self.features or SupportedFeature.WIRELESS_DEVICE_STATUS not in self.features)
                 ):
-                    if logger.isEnabledFor(logging.INFO):
-                        logger.info("%s pushing device settings %s", self, self.settings)
-                    settings.apply_all_settings(self)
+                    kept = not push and self._kept_settings()
+                    if kept:
+                        if logger.isEnabledFor(logging.INFO):
+                            logger.info("%s kept its settings, not pushing them", self)
+                    else:
+                        if logger.isEnabledFor(logging.INFO):
+                            logger.info("%s pushing device settings %s", self, self.settings)
+                        applied = settings.apply_all_settings(self)
+                        # settings that failed to apply are pushed again next time
+                        self._applied_settings = settings.fingerprint(self) if applied else None
+                else:
+                    kept = False
                 if not was_active:
                     if self.protocol < 2.0:  # Make sure to set notification flags on the device
                         self.notification_flags = self.enable_connection_notifications()
-                    else:
-                        self.set_configuration(0x11)  # signal end of configuration
+                    elif not kept:
+                        self.set_configuration(_CONFIGURED)  # signal end of configuration
                     self.read_battery()  # battery information may have changed so try to read it now
             elif was_active and self.receiver:  # need to set configuration pending flag in receiver
                 hidpp10.set_configuration_pending_flags(self.receiver, 0xFF)
@@ -469,6 +680,17 @@ class Device:
         if self.status_callback is not None:
             self.status_callback(self, alert, reason)
 
+    def _kept_settings(self):
+        """Whether the device still has the settings last applied to it and they haven't changed since,
+        going by its configuration cookie if it has one or else by reading back a few settings."""
+        if self._applied_settings is None or self._applied_settings != settings.fingerprint(self):
+            return False
+        if self.protocol >= 2.0:
+            cookie = _hidpp20.get_configuration_cookie(self)
+            if cookie is not None:
+                return cookie == _CONFIGURED
+        return settings.canaries_kept(self)
+
     def enable_connection_notifications(self, enable=True):
         """Enable or disable device (dis)connection notifications on this
         receiver."""
@@ -527,7 +749,7 @@ class Device:
             long = self.hidpp_long is True or (
                 self.hidpp_long is None and (self.bluetooth or self._protocol is not None and self._protocol >= 2.0)
             )
-            return self.low_level.request(
+            reply = self.low_level.request(
                 self.handle or (self.receiver.handle if self.receiver else None),
                 self.number,
                 request_id,
@@ -536,6 +758,27 @@ class Device:
                 long_message=long,
                 protocol=self.protocol,
             )
+            if reply is not None:
+                presence.heard(self)
+            return reply
+
+    def request_many(self, requests):
+        """Make several requests to the device, pipelining them, and return the list of their replies."""
+        if self:
+            long = self.hidpp_long is True or (
+                self.hidpp_long is None and (self.bluetooth or self._protocol is not None and self._protocol >= 2.0)
+            )
+            replies = self.low_level.request_many(
+                self.handle or (self.receiver.handle if self.receiver else None),
+                self.number,
+                requests,
+                long_message=long,
+                protocol=self.protocol,
+            )
+            if any(reply is not None for reply in replies):
+                presence.heard(self)
+            return replies
+        return [None] * len(requests)
 
     def feature_request(self, feature, function=0x00, *params, no_reply=False):
         if self.protocol >= 2.0:
@@ -562,10 +805,29 @@ class Device:
     def notify_devices(self):  # no need to notify, as there are none
         pass
 
+    def rebind(self, handle, device_info) -> bool:
+        """Take over the new node of a directly connected device that went away and came back,
+        such as a Bluetooth device waking up, keeping everything that is known about it.
+        Returns whether the device is still the same, which takes a ping and at most one more request."""
+        self.handle = handle
+        self.path = device_info.path
+        self.hidpp_short = device_info.hidpp_short
+        self.hidpp_long = device_info.hidpp_long
+        self._active = False  # so that settings are pushed when the device becomes active
+        protocol = self._protocol
+        if not self.ping() or self._protocol != protocol or self.features is not None and not self.features.still_valid():
+            return False
+        Device.registry.add(self)
+        return True
+
+    def forget(self):
+        """The device was unpaired, so drop what was remembered about it."""
+        common.device_cache.forget(common.device_cache.device_key(self))
+        self._snapshot = None
+
     def close(self):
         handle, self.handle = self.handle, None
-        if self in Device.instances:
-            Device.instances.remove(self)
+        Device.registry.remove(self)
         if hasattr(self, "cleanups"):
             for cleanup in self.cleanups:
                 cleanup(self)
@@ -46,6 +46,7 @@ if platform.system() in ("Darwin", "Windows"):
 else:
     import evdev
 
+from . import presence
 from .common import NamedInt
 from .hidpp20 import SupportedFeature
 from .special_keys import CONTROL
@@ -1098,7 +1099,7 @@ class Active(Condition):
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug("evaluate condition: %s", self)
         dev = device.find(self.devID)
-        return bool(dev and dev.ping())
+        return bool(dev and presence.check(dev))
 
     def data(self):
         return {"Active": self.devID}
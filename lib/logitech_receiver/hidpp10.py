@@ -36,6 +36,9 @@ class Device(Protocol):
     def request(self, request_id, *params):
         ...
 
+    def request_many(self, requests):
+        ...
+
     @property
     def kind(self) -> Any:
         ...
@@ -53,18 +56,36 @@ class Device(Protocol):
         ...
 
 
+def read_register_call(register: Registers | int, *params) -> tuple:
+    """A register read as a (request_id, *params) tuple, as used by request_many."""
+    # support long registers by adding a 2 in front of the register number
+    return 0x8100 | (int(register) & 0x2FF), *params
+
+
+def write_register_call(register: Registers | int, *value) -> tuple:
+    """A register write as a (request_id, *params) tuple, as used by request_many."""
+    # support long registers by adding a 2 in front of the register number
+    return 0x8000 | (int(register) & 0x2FF), *value
+
+
 def read_register(device: Device, register: Registers | int, *params) -> Any:
     assert device is not None, f"tried to read register {register:02X} from invalid device {device}"
-    # support long registers by adding a 2 in front of the register number
-    request_id = 0x8100 | (int(register) & 0x2FF)
-    return device.request(request_id, *params)
+    return device.request(*read_register_call(register, *params))
+
+
+def read_registers(device: Device, reads) -> list:
+    """Read several registers in one pipelined pass.
+
+    :param reads: a sequence of (register, *params) tuples.
+    :returns: a list with the reply to each read, ``None`` for reads that failed.
+    """
+    assert device is not None, f"tried to read registers from invalid device {device}"
+    return device.request_many([read_register_call(*read) for read in reads])
 
 
 def write_register(device: Device, register: Registers | int, *value) -> Any:
     assert device is not None, f"tried to write register {register:02X} to invalid device {device}"
-    # support long registers by adding a 2 in front of the register number
-    request_id = 0x8000 | (int(register) & 0x2FF)
-    return device.request(request_id, *value)
+    return device.request(*write_register_call(register, *value))
 
 
 def get_configuration_pending_flags(receiver):
@@ -132,17 +132,34 @@ class ChargeStatus(Flag):
     ERROR = 0x07
 
 
+def _feature_named(number: int) -> SupportedFeature | str:
+    try:
+        return SupportedFeature(number)
+    except ValueError:
+        return f"unknown:{number:04X}"
+
+
 class FeaturesArray(dict):
+    """The HID++ 2.0 features of a device.
+
+    The dict maps feature IDs to their index (False for features the device doesn't have),
+    the feature, version and flags at each index are kept in arrays indexed by feature index.
+    """
+
     def __init__(self, device):
         assert device is not None
         self.supported = True  # Actually don't know whether it is supported yet
         self.device = device
-        self.inverse = {}
-        self.version = {}
-        self.flags = {}
+        self.inverse = []  # feature at each index
+        self._versions = bytearray()
+        self._flags = bytearray()
         self.count = 0
+        self.complete = False  # whether all features are known, so that missing ones need not be looked up
+        self._fingerprint = None  # firmware of the device, validates the cached table
 
     def _check(self) -> bool:
+        if self.count > 0:  # the table has been read already
+            return self.device.online
         if not self.device.online:
             return False
         if self.supported is False:
@@ -150,7 +167,7 @@ class FeaturesArray(dict):
         if self.device.protocol and self.device.protocol < 2.0:
             self.supported = False
             return False
-        if self.count > 0:
+        if self._load_cached():
             return True
         reply = self.device.request(0x0000, struct.pack("!H", SupportedFeature.FEATURE_SET))
         if reply is not None:
@@ -161,32 +178,147 @@ class FeaturesArray(dict):
                     logger.warning("FEATURE_SET found, but failed to read features count")
                     return False
                 else:
-                    self.count = count[0] + 1  # ROOT feature not included in count
+                    self._resize(count[0] + 1)  # ROOT feature not included in count
+                    self.count = count[0] + 1
                     self[SupportedFeature.ROOT] = 0
                     self[SupportedFeature.FEATURE_SET] = fs_index
+                    self._read_all(fs_index)
                     return True
             else:
                 self.supported = False
         return False
 
+    def _resize(self, size: int) -> None:
+        if size > len(self.inverse):
+            self.inverse.extend([None] * (size - len(self.inverse)))
+            self._versions.extend(bytes(size - len(self._versions)))
+            self._flags.extend(bytes(size - len(self._flags)))
+
+    def _add(self, feature, index, version: int, flags: int) -> None:
+        self[feature] = index
+        if index is not False:
+            self._versions[index] = version
+            self._flags[index] = flags
+
+    def _read_all(self, fs_index: int) -> None:
+        """Read the whole table using pipelined FEATURE_SET requests, so that later lookups need no requests."""
+        try:
+            replies = self.device.request_many([((fs_index << 8) + 0x10, index) for index in range(1, self.count)])
+        except exceptions.FeatureCallError as e:  # keep what was read, the rest is read when looked up
+            logger.warning("%s: error reading feature table: %s", self.device, e)
+            replies = e.replies
+        for index, response in enumerate(replies, 1):
+            if response:
+                self._add(_feature_named(struct.unpack("!H", response[:2])[0]), index, response[3], response[2])
+        self.complete = None not in self.inverse
+        self._store()
+
+    def _read_fingerprint(self, fw_index: int, expected: Optional[str] = None) -> Optional[str]:
+        """The number of firmware entities and the type, name, version and build of each of them, None if not read.
+        When checking an earlier fingerprint its number of entities is used to read everything in one pipelined pass."""
+        request_id = fw_index << 8
+        try:
+            if expected:
+                count = int(expected[:2], 16)
+                count, *entities = self.device.request_many([(request_id,)] + [(request_id + 0x10, i) for i in range(count)])
+            else:
+                count = self.device.request(request_id)
+                entities = self.device.request_many([(request_id + 0x10, i) for i in range(count[0])]) if count else []
+        except exceptions.FeatureCallError:
+            return None
+        if not count or None in entities:
+            return None
+        return f"{count[0]:02x}" + "".join(entity[:8].hex() for entity in entities)
+
+    def _load_cached(self) -> bool:
+        """Fill the table from the cache if the device still has the same firmware, using one request."""
+        key = common.device_cache.device_key(self.device)
+        entry = common.device_cache.get("features", key)
+        if not entry:
+            return False
+        try:
+            features = {number: (index, version, flags) for number, index, version, flags in entry["features"]}
+            fingerprint = self._read_fingerprint(features[SupportedFeature.DEVICE_FW_VERSION][0], entry["firmware"])
+            if fingerprint is None:  # can't tell, so keep the entry for the next time
+                return False
+            if fingerprint != entry["firmware"]:
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("%s: firmware changed, discarding cached features", self.device)
+                common.device_cache.remove("features", key)
+                return False
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("%s: bad cached features: %s", self.device, e)
+            common.device_cache.remove("features", key)
+            return False
+        self._resize(entry["count"])
+        for number, (index, version, flags) in features.items():
+            self._add(_feature_named(number), False if index is None else index, version, flags)
+        self._fingerprint = fingerprint
+        self.count = entry["count"]
+        self.complete = None not in self.inverse[: self.count]
+        return True
+
+    def fingerprint(self) -> Optional[str]:
+        """The firmware of the device as used to validate cached information, None if it can't be read."""
+        if self._fingerprint is None and self._check():
+            fw_index = super().get(SupportedFeature.DEVICE_FW_VERSION)
+            if fw_index:
+                self._fingerprint = self._read_fingerprint(fw_index)
+        return self._fingerprint
+
+    def still_valid(self) -> bool:
+        """Whether the table still describes a device that went away and came back, using one request."""
+        if not self.count:
+            return True  # nothing has been read yet
+        fw_index = super().get(SupportedFeature.DEVICE_FW_VERSION)
+        if fw_index and self._fingerprint is not None:
+            return self._read_fingerprint(fw_index, self._fingerprint) == self._fingerprint
+        # the firmware was never read, so settle for the number of features being the same
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("%s: firmware not known, checking the number of features instead", self.device)
+        fs_index = super().get(SupportedFeature.FEATURE_SET)
+        count = self.device.request(fs_index << 8) if fs_index else None
+        return count is not None and count[0] + 1 == self.count
+
+    def _store(self) -> None:
+        """Remember the features found so far, so that they don't have to be looked up again."""
+        key = common.device_cache.device_key(self.device)
+        if key is None or self.fingerprint() is None:  # without the firmware there is no way to validate the entry
+            return
+        features = []
+        for number, index in self.items():
+            if index is False:
+                features.append((number, None, 0, 0))
+            else:
+                features.append((number, index, self._versions[index], self._flags[index]))
+        entry = {
+            "modelId": getattr(self.device, "_modelId", None),
+            "unitId": getattr(self.device, "_unitId", None),
+            "firmware": self._fingerprint,
+            "count": self.count,
+            "features": features,
+        }
+        common.device_cache.put("features", key, entry)
+
+    def _check_complete(self) -> None:
+        """Store the table once features looked up one at a time complete it, instead of after each lookup."""
+        if not self.complete and None not in self.inverse[: self.count]:
+            self.complete = True
+            self._store()
+
     def get_feature(self, index: int) -> SupportedFeature | None:
-        feature = self.inverse.get(index)
+        feature = self.inverse[index] if index < len(self.inverse) else None
         if feature is not None:
             return feature
         elif self._check():
-            feature = self.inverse.get(index)
-            if feature is not None:
+            feature = self.inverse[index] if index < len(self.inverse) else None
+            if feature is not None or self.complete:
                 return feature
             response = self.device.feature_request(SupportedFeature.FEATURE_SET, 0x10, index)
             if response:
-                data = struct.unpack("!H", response[:2])[0]
-                try:
-                    feature = SupportedFeature(data)
-                except ValueError:
-                    feature = f"unknown:{data:04X}"
-                self[feature] = index
-                self.version[feature] = response[3]
-                self.flags[feature] = response[2]
+                feature = _feature_named(struct.unpack("!H", response[:2])[0])
+                self._add(feature, index, response[3], response[2])
+                self._check_complete()
                 return feature
 
     def enumerate(self):  # return all features and their index, ordered by index
@@ -196,16 +328,19 @@ class FeaturesArray(dict):
                 yield feature, index
 
     def get_feature_version(self, feature: NamedInt) -> Optional[int]:
-        if self[feature]:
-            return self.version.get(feature, 0)
+        index = self[feature]
+        if index:
+            return self._versions[index]
 
     def get_flags(self, feature: NamedInt) -> Optional[int]:
-        if self[feature]:
-            return self.flags.get(feature, 0)
+        index = self[feature]
+        if index:
+            return self._flags[index]
 
     def get_hidden(self, feature: NamedInt) -> Optional[bool]:
-        if self[feature]:
-            return self.flags.get(feature, 0) & FeatureFlag.INTERNAL
+        index = self[feature]
+        if index:
+            return self._flags[index] & FeatureFlag.INTERNAL
         return True
 
     def __contains__(self, feature: NamedInt) -> bool:
@@ -223,19 +358,23 @@ class FeaturesArray(dict):
             index = super().get(feature)
             if index is not None:
                 return index
+            if self.complete:  # the device doesn't have the feature
+                return False
             response = self.device.request(0x0000, struct.pack("!H", feature))
             if response:
                 index = response[0]
-                self[feature] = index if index else False
-                self.version[feature] = response[2]
-                self.flags[feature] = response[1]
+                self._add(feature, index if index else False, response[2], response[1])
+                self._check_complete()
                 return index if index else False
 
     def __setitem__(self, feature, index):
-        if isinstance(super().get(feature), int):
-            self.inverse.pop(super().get(feature))
-        super().__setitem__(feature, index)
+        number = int(feature[8:], 16) if isinstance(feature, str) else int(feature)
+        old_index = super().get(number)
+        if old_index is not None and old_index is not False and self.inverse[old_index] == feature:
+            self.inverse[old_index] = None
+        super().__setitem__(number, index)
         if index is not False:
+            self._resize(index + 1)
             self.inverse[index] = feature
 
     def __delitem__(self, feature):
@@ -259,6 +398,8 @@ class ReprogrammableKey:
     Ref: https://drive.google.com/file/d/0BxbRzx7vEV7eU3VfMnRuRXktZ3M/view
     """
 
+    __slots__ = ("_device", "index", "_cid", "_tid", "_flags")
+
     def __init__(self, device: Device, index: int, cid: int, task_id: int, flags: int):
         self._device = device
         self.index = index
@@ -304,6 +445,8 @@ class ReprogrammableKeyV4(ReprogrammableKey):
     - mapping_flags {List[str]} -- mapping flags set on the control
     """
 
+    __slots__ = ("pos", "group", "_gmask", "_mapping_flags", "_mapped_to", "_remappable_to")
+
     def __init__(self, device: Device, index, cid, task_id, flags, pos, group, gmask):
         ReprogrammableKey.__init__(self, device, index, cid, task_id, flags)
         self.pos = pos
@@ -311,6 +454,7 @@ class ReprogrammableKeyV4(ReprogrammableKey):
         self._gmask = gmask
         self._mapping_flags = None
         self._mapped_to = None
+        self._remappable_to = None
 
     @property
     def group_mask(self) -> Generator[str]:
@@ -329,6 +473,8 @@ class ReprogrammableKeyV4(ReprogrammableKey):
 
     @property
     def remappable_to(self):
+        if self._remappable_to is not None:
+            return self._remappable_to
         self._device.keys._ensure_all_keys_queried()
         ret = common.UnsortedNamedInts()
         if self.group_mask:  # only keys with a non-zero gmask are remappable
@@ -344,6 +490,8 @@ class ReprogrammableKeyV4(ReprogrammableKey):
                     tgt_task = NamedInt(tgt_cid, tgt_task)
                     if tgt_task != self.default_task:  # don't put itself in twice
                         ret[tgt_task] = tgt_task
+        if self._device.keys._all_queried:
+            self._remappable_to = ret
         return ret
 
     @property
@@ -378,22 +526,26 @@ class ReprogrammableKeyV4(ReprogrammableKey):
                 0x20,
                 *tuple(struct.pack("!H", self._cid)),
             )
-            if mapped_data:
-                cid, mapping_flags_1, mapped_to = struct.unpack("!HBH", mapped_data[:5])
-                if cid != self._cid and logger.isEnabledFor(logging.WARNING):
-                    logger.warning(
-                        f"REPROG_CONTROLS_V4 endpoint getCidReporting on device {self._device} replied "
-                        + f"with a different control ID ({cid}) than requested ({self._cid})."
-                    )
-                self._mapped_to = mapped_to if mapped_to != 0 else self._cid
-                if len(mapped_data) > 5:
-                    (mapping_flags_2,) = struct.unpack("!B", mapped_data[5:6])
-                else:
-                    mapping_flags_2 = 0
-                self._mapping_flags = mapping_flags_1 | (mapping_flags_2 << 8)
+        except exceptions.FeatureCallError:
+            mapped_data = None
+        self._set_reporting(mapped_data)
+
+    def _set_reporting(self, mapped_data):
+        """Set the mapping from a getCidReporting reply, or to the defaults if there was no reply."""
+        if mapped_data:
+            cid, mapping_flags_1, mapped_to = struct.unpack("!HBH", mapped_data[:5])
+            if cid != self._cid and logger.isEnabledFor(logging.WARNING):
+                logger.warning(
+                    f"REPROG_CONTROLS_V4 endpoint getCidReporting on device {self._device} replied "
+                    + f"with a different control ID ({cid}) than requested ({self._cid})."
+                )
+            self._mapped_to = mapped_to if mapped_to != 0 else self._cid
+            if len(mapped_data) > 5:
+                (mapping_flags_2,) = struct.unpack("!B", mapped_data[5:6])
             else:
-                raise exceptions.FeatureCallError(msg="No reply from device.")
-        except exceptions.FeatureCallError:  # if the key hasn't ever been configured only produce a warning
+                mapping_flags_2 = 0
+            self._mapping_flags = mapping_flags_1 | (mapping_flags_2 << 8)
+        else:  # if the key hasn't ever been configured only produce a warning
             if logger.isEnabledFor(logging.WARNING):
                 logger.warning(
                     f"Feature Call Error in _getCidReporting on device {self._device} for cid {self._cid} - use defaults"
@@ -448,6 +600,7 @@ class ReprogrammableKeyV4(ReprogrammableKey):
             )
         if remap != 0:  # update mapping if changing (even if not already read)
             self._mapped_to = remap
+            self._remappable_to = None
 
         pkt = tuple(struct.pack("!HBH", self._cid, bfield & 0xFF, remap))
         # TODO: to fully support version 4 of REPROG_CONTROLS_V4, append `(bfield >> 8) & 0xff` here.
@@ -539,14 +692,23 @@ class KeysArray:
                 logger.error(f"Trying to read keys on device {device} which has no REPROG_CONTROLS(_VX) support.")
             self.keyversion = None
         self.keys = [None] * count
+        self._all_queried = False
+        self._cid_index = None  # control ID to index, once all keys are known
 
     def _ensure_all_keys_queried(self):
         """The retrieval of key information is lazy, but for certain functionality
         we need to know all keys. This function makes sure that's the case."""
+        if self._all_queried:
+            return
         with self.lock:  # don't want two threads doing this
-            for i, k in enumerate(self.keys):
-                if k is None:
-                    self._query_key(i)
+            missing = [i for i, k in enumerate(self.keys) if k is None]
+            if missing:
+                self._query_keys(missing)
+            self._all_queried = None not in self.keys
+
+    def _query_keys(self, indices):
+        for i in indices:
+            self._query_key(i)
 
     def __getitem__(self, index):
         if isinstance(index, int):
@@ -563,12 +725,19 @@ class KeysArray:
             return [self.__getitem__(i) for i in range(*indices)]
 
     def index(self, value):
-        self._ensure_all_keys_queried()
-        for index, k in enumerate(self.keys):
-            if k is not None and int(value) == int(k.key):
-                return index
+        if self._cid_index is None:
+            self._ensure_all_keys_queried()
+            cid_index = {}
+            for index, k in enumerate(self.keys):
+                if k is not None:
+                    cid_index.setdefault(int(k.key), index)
+            if not self._all_queried:  # a key might still show up, so look again next time
+                return cid_index.get(int(value))
+            self._cid_index = cid_index
+        return self._cid_index.get(int(value))
 
     def __iter__(self):
+        self._ensure_all_keys_queried()  # all the keys are going to be needed, so get them together
         for k in range(0, len(self.keys)):
             yield self.__getitem__(k)
 
@@ -590,12 +759,35 @@ class KeysArrayV2(KeysArray):
         """The mapping from Control ID groups to Controls IDs that belong to it.
         A key k can only be remapped to targets in groups within k.group_mask."""
         self.group_cids = {g: [] for g in special_keys.CidGroup}
+        self._keydata = [None] * count  # what the device said about each key
+
+    def to_snapshot(self):
+        """What the device said about the keys as plain data, for the device capability snapshot.
+        Reads the keys that are not known yet, and is None if some can't be read."""
+        self._ensure_all_keys_queried()
+        if self._all_queried:
+            return [keydata.hex() for keydata in self._keydata]
+
+    def load_snapshot(self, snapshot):
+        """Set up the keys from the device capability snapshot instead of asking the device"""
+        with self.lock:
+            for index, keydata in enumerate(snapshot):
+                self._set_key(index, bytes.fromhex(keydata))
+            self._all_queried = None not in self.keys
 
     def _query_key(self, index: int):
         if index < 0 or index >= len(self.keys):
             raise IndexError(index)
-        keydata = self.device.feature_request(SupportedFeature.REPROG_CONTROLS, 0x10, index)
+        self._set_key(index, self.device.feature_request(SupportedFeature.REPROG_CONTROLS, 0x10, index))
+
+    def _query_keys(self, indices):
+        replies = feature_request_many(self.device, SupportedFeature.REPROG_CONTROLS, [(0x10, i) for i in indices])
+        for index, keydata in zip(indices, replies):
+            self._set_key(index, keydata)
+
+    def _set_key(self, index: int, keydata):
         if keydata:
+            self._keydata[index] = keydata
             cid, task_id, flags = struct.unpack("!HHB", keydata[:5])
             self.keys[index] = ReprogrammableKey(self.device, index, cid, task_id, flags)
             self.cid_to_tid[cid] = task_id
@@ -610,8 +802,33 @@ class KeysArrayV4(KeysArrayV2):
     def _query_key(self, index: int):
         if index < 0 or index >= len(self.keys):
             raise IndexError(index)
-        keydata = self.device.feature_request(SupportedFeature.REPROG_CONTROLS_V4, 0x10, index)
+        self._set_key(index, self.device.feature_request(SupportedFeature.REPROG_CONTROLS_V4, 0x10, index))
+
+    def _query_keys(self, indices):
+        """Read the information and then the reporting of the keys using pipelined requests."""
+        feature = SupportedFeature.REPROG_CONTROLS_V4
+        replies = feature_request_many(self.device, feature, [(0x10, i) for i in indices])
+        for index, keydata in zip(indices, replies):
+            self._set_key(index, keydata)
+        self._query_reporting([self.keys[i] for i in indices if self.keys[i] is not None])
+
+    def _query_reporting(self, keys):
+        replies = feature_request_many(
+            self.device, SupportedFeature.REPROG_CONTROLS_V4, [(0x20, *struct.pack("!H", k._cid)) for k in keys]
+        )
+        for key, mapped_data in zip(keys, replies):
+            key._set_reporting(mapped_data)
+
+    def query_reporting(self):
+        """Make sure the reporting of all the keys is known, reading what isn't using pipelined requests."""
+        self._ensure_all_keys_queried()
+        missing = [k for k in self.keys if k is not None and k._mapped_to is None]
+        if missing:
+            self._query_reporting(missing)
+
+    def _set_key(self, index: int, keydata):
         if keydata:
+            self._keydata[index] = keydata
             cid, task_id, flags1, pos, group, gmask, flags2 = struct.unpack("!HHBBBBB", keydata[:9])
             flags = flags1 | (flags2 << 8)
             self.keys[index] = ReprogrammableKeyV4(self.device, index, cid, task_id, flags, pos, group, gmask)
@@ -640,6 +857,7 @@ class KeysArrayPersistent(KeysArray):
         if index < 0 or index >= len(self.keys):
             raise IndexError(index)
         keydata = self.device.feature_request(SupportedFeature.PERSISTENT_REMAPPABLE_ACTION, 0x20, index, 0xFF)
+        mapped_data = None
         if keydata:
             key = struct.unpack("!H", keydata[:2])[0]
             mapped_data = self.device.feature_request(
@@ -649,6 +867,21 @@ class KeysArrayPersistent(KeysArray):
                 key & 0xFF,
                 0xFF,
             )
+        self._set_key(index, keydata, mapped_data)
+
+    def _query_keys(self, indices):
+        """Read the keys and then their mappings using pipelined requests."""
+        feature = SupportedFeature.PERSISTENT_REMAPPABLE_ACTION
+        replies = feature_request_many(self.device, feature, [(0x20, i, 0xFF) for i in indices])
+        found = {i: struct.unpack("!H", keydata[:2])[0] for i, keydata in zip(indices, replies) if keydata}
+        requests = [(0x30, key >> 8, key & 0xFF, 0xFF) for key in found.values()]
+        mappings = dict(zip(found, feature_request_many(self.device, feature, requests)))
+        for index, keydata in zip(indices, replies):
+            self._set_key(index, keydata, mappings.get(index))
+
+    def _set_key(self, index: int, keydata, mapped_data):
+        if keydata:
+            key = struct.unpack("!H", keydata[:2])[0]
             if mapped_data:
                 _ignore, _ignore, actionId, remapped, modifiers, status = struct.unpack("!HBBHBB", mapped_data[:8])
             else:
@@ -751,6 +984,22 @@ class ActionId(IntEnum):
 
 
 class Gesture:
+    __slots__ = (
+        "_device",
+        "id",
+        "gesture",
+        "can_be_enabled",
+        "can_be_diverted",
+        "show_in_ui",
+        "desired_software_default",
+        "persistent",
+        "default_enabled",
+        "index",
+        "diversion_index",
+        "_enabled",
+        "_diverted",
+    )
+
     def __init__(self, device, low, high, next_index, next_diversion_index):
         self._device = device
         self.id = low
@@ -795,6 +1044,7 @@ class Gesture:
             reply = self._device.feature_request(
                 SupportedFeature.GESTURE_2, 0x20, offset, 0x01, mask, mask if enable else 0x00
             )
+            self._enabled = bool(enable) if reply else None
             return reply
 
     def diverted(self):  # is the gesture diverted?
@@ -817,6 +1067,7 @@ class Gesture:
                 mask,
                 mask if diverted else 0x00,
             )
+            self._diverted = bool(diverted) if reply else None
             return reply
 
     def as_int(self):
@@ -834,6 +1085,8 @@ class Gesture:
 
 
 class Param:
+    __slots__ = ("_device", "id", "param", "size", "show_in_ui", "_value", "_default_value", "index")
+
     def __init__(self, device, low: int, high, next_param_index):
         self._device = device
         self.id = low
@@ -871,8 +1124,9 @@ class Param:
             return self._default_value
 
     def write(self, bytes):
-        self._value = bytes
-        return self._device.feature_request(SupportedFeature.GESTURE_2, 0x80, self.index, bytes, 0xFF)
+        reply = self._device.feature_request(SupportedFeature.GESTURE_2, 0x80, self.index, bytes, 0xFF)
+        self._value = common.bytes2int(bytes[: self.size]) if reply else None
+        return reply
 
     def __str__(self):
         return str(self.param)
@@ -955,6 +1209,42 @@ class Gestures:
                 else:
                     logger.warning(f"Unimplemented GESTURE_2 field {field_low} {field_high} found.")
                 index += 1
+        self._read_state()
+
+    def _read_state(self):
+        """Read whether gestures are enabled and diverted and the values of params and specs in one pipelined batch.
+        The objects keep the values, so later reads need no requests."""
+        gestures = self.gestures.values()
+        params = list(self.params.values())
+        specs = list(self.specs.values())
+        enable_offsets = sorted({g.enable_offset_mask()[0] for g in gestures if g.index is not None})
+        divert_offsets = sorted({g.diversion_offset_mask()[0] for g in gestures if g.diversion_index is not None})
+        requests = [(0x10, offset, 0x01, 0xFF) for offset in enable_offsets]
+        requests += [(0x30, offset, 0x01, 0xFF) for offset in divert_offsets]
+        requests += [(0x70, p.index, 0xFF) for p in params] + [(0x60, p.index, 0xFF) for p in params]
+        requests += [(0x50, s.id, 0xFF) for s in specs]
+        if not requests:
+            return
+        replies = feature_request_many(self.device, SupportedFeature.GESTURE_2, requests)
+        enabled = dict(zip(enable_offsets, replies))
+        replies = replies[len(enable_offsets) :]
+        diverted = dict(zip(divert_offsets, replies))
+        replies = replies[len(divert_offsets) :]
+        for g in gestures:
+            offset, mask = g.enable_offset_mask()
+            if enabled.get(offset):
+                g._enabled = bool(enabled[offset][0] & mask)
+            offset, mask = g.diversion_offset_mask()
+            if diverted.get(offset):
+                g._diverted = bool(diverted[offset][0] & mask)
+        for p, value, default in zip(params, replies, replies[len(params) :]):
+            if value:
+                p._value = common.bytes2int(value[: p.size])
+            if default:
+                p._default_value = common.bytes2int(default[: p.size])
+        for s, value in zip(specs, replies[2 * len(params) :]):
+            if value:
+                s._value = common.bytes2int(value[: s.byte_count])
 
     def gesture(self, gesture):
         return self.gestures.get(gesture, None)
@@ -1064,10 +1354,19 @@ LEDEffects = {
 
 
 class LEDEffectSetting:  # an effect plus its parameters
+    __slots__ = ("ID", "color", "speed", "period", "intensity", "ramp", "form", "saturation", "bytes")
+
     def __init__(self, **kwargs):
         self.ID = None
         for key, val in kwargs.items():
-            setattr(self, key, val)
+            if key in self.__slots__:
+                setattr(self, key, val)
+            else:
+                logger.warning("LED effect setting: ignoring unknown parameter %s", key)
+
+    def as_dict(self):
+        """The fields that are set, in a fixed order"""
+        return {key: getattr(self, key) for key in self.__slots__ if hasattr(self, key)}
 
     @classmethod
     def from_bytes(cls, bytes, options=None):
@@ -1100,7 +1399,7 @@ class LEDEffectSetting:  # an effect plus its parameters
 
     @classmethod
     def to_yaml(cls, dumper, data):
-        return dumper.represent_mapping("!LEDEffectSetting", data.__dict__, flow_style=True)
+        return dumper.represent_mapping("!LEDEffectSetting", data.as_dict(), flow_style=True)
 
     def __eq__(self, other):
         return isinstance(other, self.__class__) and self.to_bytes() == other.to_bytes()
@@ -1115,9 +1414,17 @@ yaml.add_representer(LEDEffectSetting, LEDEffectSetting.to_yaml)
 
 class LEDEffectInfo:  # an effect that a zone can do
     def __init__(self, feature, function, device, zindex, eindex):
-        info = device.feature_request(feature, function, zindex, eindex, 0x00)
+        self._unpack(device.feature_request(feature, function, zindex, eindex, 0x00))
+
+    def _unpack(self, info):
         self.zindex, self.index, self.ID, self.capabilities, self.period = struct.unpack("!BBHHH", info[0:8])
 
+    @classmethod
+    def from_reply(cls, info):
+        effect = cls.__new__(cls)
+        effect._unpack(info)
+        return effect
+
     def __str__(self):
         return f"LEDEffectInfo({self.zindex}, {self.index}, {self.ID}, {self.capabilities: x}, {self.period})"
 
@@ -1144,8 +1451,12 @@ class LEDZoneInfo:  # effects that a zone can do
         self.index = index
         self.location = LEDZoneLocations[self.location] if LEDZoneLocations[self.location] else self.location
         self.effects = []
-        for i in range(0, self.count):
-            self.effects.append(LEDEffectInfo(feature, effect_function, device, index, i))
+        replies = feature_request_many(device, feature, [(effect_function, index, i, 0x00) for i in range(0, self.count)])
+        for i, info in enumerate(replies):
+            if info:
+                self.effects.append(LEDEffectInfo.from_reply(info))
+            else:  # try again on its own
+                self.effects.append(LEDEffectInfo(feature, effect_function, device, index, i))
 
     def to_command(self, setting):
         for i in range(0, len(self.effects)):
@@ -1171,6 +1482,37 @@ class LEDEffectsInfo:  # effects that the LEDs can do, using COLOR_LED_EFFECTS
     def to_command(self, index, setting):
         return self.zones[index].to_command(setting)
 
+    def to_snapshot(self):
+        """The zones and their effects as plain data, for the device capability snapshot"""
+        zones = [[z.index, int(z.location), [[e.ID, e.capabilities, e.period] for e in z.effects]] for z in self.zones]
+        return {"readable": self.readable, "zones": zones}
+
+    @classmethod
+    def from_snapshot(cls, device, snapshot):
+        info = cls.__new__(cls)
+        info.device = device
+        info.readable = snapshot["readable"]
+        info.zones = []
+        for index, location, effects in snapshot["zones"]:
+            zone = LEDZoneInfo.__new__(LEDZoneInfo)
+            zone.index = index
+            zone.location = LEDZoneLocations[location] if LEDZoneLocations[location] else location
+            zone.count = len(effects)
+            zone.effects = []
+            for eindex, (ID, capabilities, period) in enumerate(effects):
+                effect = LEDEffectInfo.__new__(LEDEffectInfo)
+                effect.zindex, effect.index, effect.ID, effect.capabilities, effect.period = (
+                    index,
+                    eindex,
+                    ID,
+                    capabilities,
+                    period,
+                )
+                zone.effects.append(effect)
+            info.zones.append(zone)
+        info.count = len(info.zones)
+        return info
+
     def __str__(self):
         zones = "\n".join([str(z) for z in self.zones])
         return f"LEDEffectsInfo({self.device}, readable {self.readable}\n{zones})"
@@ -1232,10 +1574,19 @@ ButtonConsumerKeys = special_keys.HID_CONSUMERCODES
 class Button:
     """A button mapping"""
 
+    __slots__ = ("behavior", "sector", "address", "type", "modifiers", "value", "data", "bytes")
+
     def __init__(self, **kwargs):
         self.behavior = None
         for key, val in kwargs.items():
-            setattr(self, key, val)
+            if key in self.__slots__:
+                setattr(self, key, val)
+            else:
+                logger.warning("button mapping: ignoring unknown field %s", key)
+
+    def as_dict(self):
+        """The fields that are set, in a fixed order"""
+        return {key: getattr(self, key) for key in self.__slots__ if hasattr(self, key)}
 
     @classmethod
     def from_yaml(cls, loader, node):
@@ -1244,7 +1595,7 @@ class Button:
 
     @classmethod
     def to_yaml(cls, dumper, data):
-        return dumper.represent_mapping("!Button", data.__dict__, flow_style=True)
+        return dumper.represent_mapping("!Button", data.as_dict(), flow_style=True)
 
     @classmethod
     def from_bytes(cls, bytes_) -> Button:
@@ -1307,7 +1658,7 @@ class Button:
     def __repr__(self):
         return "%s{%s}" % (
             self.__class__.__name__,
-            ", ".join([f"{str(key)}:{str(val)}" for key, val in self.__dict__.items()]),
+            ", ".join([f"{str(key)}:{str(val)}" for key, val in self.as_dict().items()]),
         )
 
 
@@ -1539,11 +1890,40 @@ yaml.add_representer(OnboardProfiles, OnboardProfiles.to_yaml)
 
 def feature_request(device, feature, function=0x00, *params, no_reply=False):
     if device.online and device.features:
-        if feature in device.features:
+        try:
             feature_index = device.features[feature]
+        except exceptions.FeatureCallError:
+            return None
+        if feature_index is not None and feature_index is not False:
             return device.request((feature_index << 8) + (function & 0xFF), *params, no_reply=no_reply)
 
 
+def feature_call(device, feature, function=0x00, *params):
+    """A call to a feature as a (request_id, *params) tuple, as used by request_many.
+    Returns None if the device doesn't have the feature."""
+    if device.online and device.features:
+        try:
+            feature_index = device.features[feature]
+        except exceptions.FeatureCallError:
+            return None
+        if feature_index is not None and feature_index is not False:
+            return (feature_index << 8) + (function & 0xFF), *params
+
+
+def feature_request_many(device, feature, requests):
+    """Make several calls to a feature, each a (function, *params) tuple, pipelining the requests.
+    Returns the list of replies, with None for calls that failed.
+    Raises FeatureCallError, as feature_request does, if the device returned an error for any of the calls."""
+    if device.online and device.features:
+        try:
+            feature_index = device.features[feature]
+        except exceptions.FeatureCallError:
+            return [None] * len(requests)
+        if feature_index is not None and feature_index is not False:
+            return device.request_many([((feature_index << 8) + (function & 0xFF), *params) for function, *params in requests])
+    return [None] * len(requests)
+
+
 class Hidpp20:
     def get_firmware(self, device) -> tuple[common.FirmwareInfo] | None:
         """Reads a device's firmware info.
@@ -1894,6 +2274,12 @@ class Hidpp20:
     def config_change(self, device: Device, configuration, no_reply=False):
         return device.feature_request(SupportedFeature.CONFIG_CHANGE, 0x10, configuration, no_reply=no_reply)
 
+    def get_configuration_cookie(self, device: Device):
+        """The cookie last set by config_change, which the device clears when it loses its configuration."""
+        result = device.feature_request(SupportedFeature.CONFIG_CHANGE, 0x00)
+        if result:
+            return struct.unpack("!B", result[:1])[0]
+
 
 battery_functions = {
     SupportedFeature.BATTERY_STATUS: Hidpp20.get_battery_status,
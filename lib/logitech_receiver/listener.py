@@ -43,9 +43,10 @@ class _ThreadedHandle:
         self._local = threading.local()
         # take over the current handle for the thread doing the replacement
         self._local.handle = handle
-        self._handles = [handle]
+        self._handles = {threading.current_thread(): handle}  # thread => the handle it opened
 
     def _open(self):
+        self._close_finished()
         handle = base.open_path(self.path)
         if handle is None:
             logger.error("%r failed to open new handle", self)
@@ -53,16 +54,22 @@ class _ThreadedHandle:
             # if logger.isEnabledFor(logging.DEBUG):
             #     logger.debug("%r opened new handle %d", self, handle)
             self._local.handle = handle
-            self._handles.append(handle)
+            self._handles[threading.current_thread()] = handle
             return handle
 
+    def _close_finished(self):
+        # threads that have finished won't use their handles again
+        for thread, handle in list(self._handles.items()):
+            if not thread.is_alive() and self._handles.pop(thread, None) is not None:
+                base.close(handle)
+
     def close(self):
         if self._local:
             self._local = None
-            handles, self._handles = self._handles, []
+            handles, self._handles = self._handles, {}
             if logger.isEnabledFor(logging.DEBUG):
-                logger.debug("%r closing %s", self, handles)
-            for h in handles:
+                logger.debug("%r closing %s", self, list(handles.values()))
+            for h in handles.values():
                 base.close(h)
 
     @property
@@ -121,13 +128,15 @@ class EventsListener(threading.Thread):
         self.daemon = True
         self._active = False
         self.receiver = receiver
+        self._handle = None  # the threaded handle this listener reads from
         self._queued_notifications = queue.Queue(16)
         self._notifications_callback = notifications_callback
 
     def run(self):
         self._active = True
         # replace the handle with a threaded one
-        self.receiver.handle = _ThreadedHandle(self, self.receiver.path, self.receiver.handle)
+        self._handle = _ThreadedHandle(self, self.receiver.path, self.receiver.handle)
+        self.receiver.handle = self._handle
         if logger.isEnabledFor(logging.INFO):
             logger.info("started with %s (%d)", self.receiver, int(self.receiver.handle))
         self.has_started()
@@ -142,7 +151,8 @@ class EventsListener(threading.Thread):
                     n = base.read(self.receiver.handle, _EVENT_READ_TIMEOUT)
                 except exceptions.NoReceiver:
                     logger.warning("%s disconnected", self.receiver.name)
-                    self.receiver.close()
+                    if not self.rebound():
+                        self.receiver.close()
                     break
                 if n:
                     n = base.make_notification(*n)
@@ -170,6 +180,11 @@ class EventsListener(threading.Thread):
         """Called right before the thread stops."""
         pass
 
+    def rebound(self):
+        """Whether the receiver or device has been taken over by a new node since this listener started,
+        so that it is not this listener's to close any more."""
+        return self.receiver.handle is not None and self.receiver.handle is not self._handle
+
     def _notifications_hook(self, n):
         # Only consider unhandled notifications that were sent from this thread,
         # i.e. triggered by a callback handling a previous notification.
@@ -34,6 +34,8 @@ from . import diversion
 from . import hidpp10
 from . import hidpp10_constants
 from . import hidpp20
+from . import presence
+from . import settings
 from . import settings_templates
 from .common import Alert
 from .common import BatteryStatus
@@ -111,6 +113,7 @@ def process_device_notification(device: Device, notification: HIDPPNotification)
 
     # 0x40 to 0x7F appear to be HID++ 1.0 or DJ notifications
     if notification.sub_id >= 0x40:
+        presence.heard(device)
         if notification.report_id == base.DJ_MESSAGE_ID:
             return _process_dj_notification(device, notification)
         else:
@@ -125,6 +128,9 @@ def process_device_notification(device: Device, notification: HIDPPNotification)
     if device.protocol < 2.0:
         return _process_hidpp10_custom_notification(device, notification)
 
+    if notification.address & 0x0F == base.KERNEL_SW_ID:
+        return _process_driver_reply(device, notification)
+
     # assuming 0x00 to 0x3F are feature (HID++ 2.0) notifications
     if not device.features:
         logger.warning("%s: feature notification but features not set up: %02X %s", device, notification.sub_id, notification)
@@ -176,7 +182,9 @@ def _process_hidpp10_notification(device: Device, notification: HIDPPNotificatio
     if notification.sub_id == Notification.CONNECT_DISCONNECT:  # device unpairing
         if notification.address == 0x02:
             # device un-paired
+            device.forget()
             device.wpid = None
+            device.receiver.slot_unpaired(device.number)
             if device.number in device.receiver:
                 del device.receiver[device.number]
             device.changed(active=False, alert=Alert.ALL, reason=_("unpaired"))
@@ -237,6 +245,20 @@ def _process_hidpp10_notification(device: Device, notification: HIDPPNotificatio
     logger.warning("%s: unrecognized %s", device, notification)
 
 
+def _process_driver_reply(device: Device, notification: HIDPPNotification):
+    """The Linux HID++ driver used a feature, such as to set up the wheel when the device connected,
+    so make sure that the settings for that feature still have the values Solaar applied."""
+    try:
+        feature = device.features.get_feature(notification.sub_id)
+    except IndexError:
+        return False
+    if feature is not None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s: driver used feature %s, function %d", device, feature, notification.address >> 4)
+        settings.reapply_if_changed(device, feature)
+    return True
+
+
 def _process_feature_notification(device: Device, notification: HIDPPNotification):
     old_present, device.present = device.present, True  # the device is generating a feature notification so it must be present
     try:
@@ -0,0 +1,93 @@
+## Copyright (C) 2014-2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Tracks whether devices are online from what is heard from them.
+
+Connection notifications say whether a device is online and any other frame from a device shows that it is.
+A device only needs to be pinged when nothing has been heard about it for a while.
+Callers that want to know when devices go online or offline subscribe instead of pinging.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import typing
+
+from typing import Callable
+
+if typing.TYPE_CHECKING:
+    from .device import Device
+
+logger = logging.getLogger(__name__)
+
+STALE_AFTER = 60.0  # seconds after which what was last heard from a device no longer says whether it is online
+
+_subscribers = []
+_subscribers_lock = threading.Lock()
+
+
+def subscribe(callback: Callable[[Device, bool], None]):
+    """Call ``callback(device, online)`` whenever a device goes online or offline.
+
+    The callback runs on the thread that noticed the change, usually a listener thread.
+    """
+    with _subscribers_lock:
+        if callback not in _subscribers:
+            _subscribers.append(callback)
+
+
+def unsubscribe(callback: Callable[[Device, bool], None]):
+    with _subscribers_lock:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
+
+
+def heard(device: Device):
+    """Something was heard from or about the device, so its online state is up to date."""
+    device._heard = time.monotonic()
+
+
+def stale(device: Device, now=None) -> bool:
+    """Whether nothing has been heard from or about the device recently."""
+    if device._heard is None:
+        return True
+    return (time.monotonic() if now is None else now) - device._heard > STALE_AFTER
+
+
+def update(device: Device, online, was_online):
+    """Record a new online state for the device, telling subscribers if it changed."""
+    if online is not None:
+        heard(device)
+    if bool(online) == bool(was_online):
+        return
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s is now %s", device, "online" if online else "offline")
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+    for callback in subscribers:
+        try:
+            callback(device, bool(online))
+        except Exception:
+            logger.exception("presence callback %s for %s", callback, device)
+
+
+def check(device: Device) -> bool:
+    """Whether the device is online, only pinging it if nothing has been heard from or about it recently."""
+    if device.online is not None and not stale(device):
+        return bool(device.online)
+    return device.ping()
@@ -47,6 +47,9 @@ if typing.TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+_SETTLE_DELAYS = (0.02, 0.05, 0.1)  # seconds to wait before asking a receiver again for pairing information
+_PREFETCH_MAX_AGE = 10  # seconds for which slot registers read ahead of time are used
+
 _hidpp10 = hidpp10.Hidpp10()
 
 
@@ -63,6 +66,9 @@ class LowLevelInterface(Protocol):
     def request(self, handle, devnumber, request_id, *params, **kwargs):
         ...
 
+    def request_many(self, handle, devnumber, requests, **kwargs):
+        ...
+
     def close(self, handle):
         ...
 
@@ -135,7 +141,34 @@ class Receiver:
     The paired devices are available through the sequence interface.
     """
 
+    __slots__ = (
+        "low_level",
+        "isDevice",
+        "handle",
+        "path",
+        "product_id",
+        "setting_callback",
+        "status_callback",
+        "receiver_kind",
+        "serial",
+        "max_devices",
+        "_firmware",
+        "_remaining_pairings",
+        "_count",
+        "_paired",
+        "_prefetched",
+        "_prefetched_at",
+        "_slots_read",
+        "_devices",
+        "name",
+        "may_unpair",
+        "re_pairs",
+        "notification_flags",
+        "pairing",
+    )
+
     read_register: Callable = hidpp10.read_register
+    read_registers: Callable = hidpp10.read_registers
     write_register: Callable = hidpp10.write_register
     number = 0xFF
     kind = None
@@ -163,6 +196,11 @@ class Receiver:
         self.max_devices = None
         self._firmware = None
         self._remaining_pairings = None
+        self._count = None  # number of paired devices, kept up to date from connection notifications
+        self._paired = None  # slots known to have a paired device, None if not known
+        self._prefetched = {}  # (register, *params) => reply, for slot registers read ahead of time
+        self._prefetched_at = 0  # when the slot registers were read ahead
+        self._slots_read = False  # whether the slots were read ahead, which waits until they are first needed
         self._devices = {}
         self.name = product_info.get("name", "Receiver")
         self.may_unpair = product_info.get("may_unpair", False)
@@ -239,10 +277,53 @@ class Receiver:
         return flag_bits
 
     def device_codename(self, n):
-        codename = self.read_register(Registers.RECEIVER_INFO, InfoSubRegisters.DEVICE_NAME + n - 1)
+        codename = self._read_slot_register(Registers.RECEIVER_INFO, InfoSubRegisters.DEVICE_NAME + n - 1)
         if codename:
             return extract_codename(codename)
 
+    def _slot_registers(self, n):
+        """The registers with information on the device in a slot, the pairing information register first."""
+        return (
+            (Registers.RECEIVER_INFO, InfoSubRegisters.PAIRING_INFORMATION + n - 1),
+            (Registers.RECEIVER_INFO, InfoSubRegisters.EXTENDED_PAIRING_INFORMATION + n - 1),
+            (Registers.RECEIVER_INFO, InfoSubRegisters.DEVICE_NAME + n - 1),
+        )
+
+    def read_slots(self):
+        """Read the information on all slots in one pipelined pass, unless no devices are paired."""
+        self._slots_read = True
+        if self._count is None:
+            connection = self.read_register(Registers.RECEIVER_CONNECTION)
+            if connection is not None:
+                self._count = extract_connection_count(connection)
+                self._remaining_pairings = extract_remaining_pairings(connection)
+        if not self._count:  # nothing to read, or the receiver isn't answering
+            self._paired = set() if self._count == 0 else None
+            return
+        slots = {n: self._slot_registers(n) for n in range(1, (self.max_devices or 0) + 1)}
+        replies = iter(self.read_registers([read for registers in slots.values() for read in registers]))
+        self._prefetched_at = time.time()
+        paired = set()
+        for n, registers in slots.items():
+            for position, read in enumerate(registers):
+                reply = next(replies)
+                if reply is not None:
+                    self._prefetched[read] = reply
+                    if position == 0:
+                        paired.add(n)
+        # only trust the slots if they account for all the paired devices
+        self._paired = paired if self._count is not None and len(paired) >= self._count else None
+
+    def _read_slot_register(self, register, *params):
+        if self._prefetched and time.time() - self._prefetched_at > _PREFETCH_MAX_AGE:
+            self._prefetched.clear()  # the receiver may have changed since
+        reply = self._prefetched.pop((register, *params), None)
+        return reply if reply is not None else self.read_register(register, *params)
+
+    def _forget_slot(self, n):
+        for read in self._slot_registers(n):
+            self._prefetched.pop(read, None)
+
     def notify_devices(self):
         """Scan all devices."""
         if self.handle:
@@ -263,7 +344,7 @@ class Receiver:
         polling_rate = ""
         serial = None
         power_switch = "(unknown)"
-        pair_info = self.read_register(Registers.RECEIVER_INFO, InfoSubRegisters.PAIRING_INFORMATION + n - 1)
+        pair_info = self._read_slot_register(Registers.RECEIVER_INFO, InfoSubRegisters.PAIRING_INFORMATION + n - 1)
         if pair_info:  # a receiver that uses Unifying-style pairing registers
             wpid = extract_wpid(pair_info[3:5])
             kind = extract_device_kind(pair_info[7] & 0x0F)
@@ -279,7 +360,7 @@ class Receiver:
                 raise exceptions.NoSuchDevice(number=n, receiver=self, error="read pairing information - non-unifying")
         else:
             raise exceptions.NoSuchDevice(number=n, receiver=self, error="read pairing information")
-        pair_info = self.read_register(Registers.RECEIVER_INFO, InfoSubRegisters.EXTENDED_PAIRING_INFORMATION + n - 1)
+        pair_info = self._read_slot_register(Registers.RECEIVER_INFO, InfoSubRegisters.EXTENDED_PAIRING_INFORMATION + n - 1)
         if pair_info:
             power_switch = extract_power_switch_location(pair_info)
             serial = extract_serial(pair_info[1:5])
@@ -290,6 +371,17 @@ class Receiver:
                 serial = extract_serial(pair_info[1:5])
         return {"wpid": wpid, "kind": kind, "polling": polling_rate, "serial": serial, "power_switch": power_switch}
 
+    def _settled_pairing_information(self, number):
+        """The pairing information, asking again with increasing waits while the receiver settles after a connection."""
+        for delay in _SETTLE_DELAYS:
+            try:
+                return self.device_pairing_information(number)
+            except exceptions.NoSuchDevice:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("%s: no pairing information for device %d yet, asking again", self, number)
+                time.sleep(delay)
+        return self.device_pairing_information(number)
+
     def register_new_device(self, number, notification=None):
         if self._devices.get(number) is not None:
             raise IndexError(f"{self}: device number {int(number)} already registered")
@@ -297,9 +389,10 @@ class Receiver:
         assert notification is None or notification.devnumber == number
         assert notification is None or notification.sub_id == Notification.DJ_PAIRING
 
+        if self.pairing.lock_open or self.pairing.discovering:  # may be a new pairing, so what was read ahead is stale
+            self._forget_slot(number)
         try:
-            time.sleep(0.05)  # let receiver settle
-            info = self.device_pairing_information(number)
+            info = self._settled_pairing_information(number)
             if notification is not None:
                 online, _e, nwpid, nkind = self.notification_information(number, notification)
                 if info["wpid"] is None:
@@ -316,6 +409,7 @@ class Receiver:
             if logger.isEnabledFor(logging.INFO):
                 logger.info("%s: found new device %d (%s)", self, number, dev.wpid)
             self._devices[number] = dev
+            self._slot_paired(number)
             return dev
         except exceptions.NoSuchDevice as e:
             logger.warning("register new device failed for %s device %d error %s", e.receiver, e.number, e.error)
@@ -332,19 +426,49 @@ class Receiver:
             logger.warning("%s: failed to %s the receiver lock", self, "close" if lock_closed else "open")
 
     def count(self):
-        count = self.read_register(Registers.RECEIVER_CONNECTION)
-        if count is None:
-            return 0
-        return extract_connection_count(count)
+        if self._count is None:
+            count = self.read_register(Registers.RECEIVER_CONNECTION)
+            if count is None:
+                return 0
+            self._count = extract_connection_count(count)
+        return self._count
+
+    def _slot_paired(self, number):
+        # a device connected in this slot, so it is paired even if it was not when the slots were read
+        if self._paired is None:
+            self._count = None  # can't tell whether this is a new pairing, so read the count again when needed
+        elif number not in self._paired:
+            self._paired.add(number)
+            if self._count is not None and len(self._paired) > self._count:
+                self._count = len(self._paired)
+
+    def slot_unpaired(self, number):
+        """The device in a slot was unpaired, so drop what is known about the slot and update the count.
+        Can be called more than once for the same unpairing."""
+        self._forget_slot(number)
+        if self._paired is None:
+            self._count = None  # can't tell whether this was counted already, so read the count again when needed
+        elif number in self._paired:
+            self._paired.discard(number)
+            if self._count:
+                self._count -= 1
 
     def request(self, request_id, *params):
         if bool(self):
             return self.low_level.request(self.handle, 0xFF, request_id, *params)
 
+    def request_many(self, requests):
+        """Make several requests to the receiver, pipelining them, and return the list of their replies."""
+        if bool(self):
+            return self.low_level.request_many(self.handle, 0xFF, requests)
+        return [None] * len(requests)
+
     def reset_pairing(self):
         self.pairing = Pairing()
 
     def __iter__(self):
+        if not self._slots_read:
+            self.read_slots()
         connected_devices = self.count()
         found_devices = 0
         for number in range(1, 8):  # some receivers have devices past their max # devices
@@ -352,6 +476,8 @@ class Receiver:
                 return
             if number in self._devices:
                 dev = self._devices[number]
+            elif self._paired is not None and number <= self.max_devices and number not in self._paired:
+                continue  # an empty slot
             else:
                 dev = self.__getitem__(number)
             if dev is not None:
@@ -389,7 +515,8 @@ class Receiver:
             return
 
         if self.re_pairs and not force:
-            # invalidate the device, but these receivers don't unpair per se
+            # invalidate the device, but these receivers don't unpair per se, so the slot stays paired
+            self._forget_slot(key)
             dev.online = False
             dev.wpid = None
             if key in self._devices:
@@ -399,13 +526,16 @@ class Receiver:
             reply = self._unpair_device_per_receiver(key)
             if reply:
                 # invalidate the device
+                dev.forget()
                 dev.online = False
                 dev.wpid = None
                 if key in self._devices:
                     del self._devices[key]
+                self.slot_unpaired(key)
                 if logger.isEnabledFor(logging.INFO):
                     logger.info("%s unpaired device %s", self, dev)
             else:
+                self._count = None  # the device may be gone anyway, so read the count again when needed
                 logger.error("%s failed to unpair device %s", self, dev)
                 raise Exception(f"failed to unpair device {dev.name}: {key}")
 
@@ -455,6 +585,8 @@ class Receiver:
 class BoltReceiver(Receiver):
     """Bolt receivers use a different pairing prototol and have different pairing registers"""
 
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -464,13 +596,19 @@ class BoltReceiver(Receiver):
         self.max_devices = product_info.get("max_devices", 1)
 
     def device_codename(self, n):
-        codename = self.read_register(Registers.RECEIVER_INFO, InfoSubRegisters.BOLT_DEVICE_NAME + n, 0x01)
+        codename = self._read_slot_register(Registers.RECEIVER_INFO, InfoSubRegisters.BOLT_DEVICE_NAME + n, 0x01)
         if codename:
             codename = codename[3 : 3 + min(14, ord(codename[2:3]))]
             return codename.decode("ascii")
 
+    def _slot_registers(self, n):
+        return (
+            (Registers.RECEIVER_INFO, InfoSubRegisters.BOLT_PAIRING_INFORMATION + n),
+            (Registers.RECEIVER_INFO, InfoSubRegisters.BOLT_DEVICE_NAME + n, 0x01),
+        )
+
     def device_pairing_information(self, n: int) -> dict:
-        pair_info = self.read_register(Registers.RECEIVER_INFO, InfoSubRegisters.BOLT_PAIRING_INFORMATION + n)
+        pair_info = self._read_slot_register(Registers.RECEIVER_INFO, InfoSubRegisters.BOLT_PAIRING_INFORMATION + n)
         if pair_info:
             wpid = extract_wpid(pair_info[3:4] + pair_info[2:3])
             kind = extract_device_kind(pair_info[1] & 0x0F)
@@ -503,16 +641,22 @@ class BoltReceiver(Receiver):
 
 
 class UnifyingReceiver(Receiver):
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
 
 class NanoReceiver(Receiver):
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
 
 class LightSpeedReceiver(Receiver):
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -520,6 +664,8 @@ class LightSpeedReceiver(Receiver):
 class Ex100Receiver(Receiver):
     """A very old style receiver, somewhat different from newer receivers"""
 
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -527,6 +673,9 @@ class Ex100Receiver(Receiver):
         self.serial = None
         self.max_devices = product_info.get("max_devices", 1)
 
+    def _slot_registers(self, n):
+        return ()  # devices are found through udev
+
     def notification_information(self, number, notification):
         """Extract information from 27Mz-style notification and device index"""
         assert notification.address == 0x02
@@ -15,9 +15,12 @@
 ## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 from __future__ import annotations
 
+import heapq
 import logging
 import struct
+import threading
 import time
+import weakref
 
 from enum import IntEnum
 from typing import Any
@@ -25,6 +28,9 @@ from typing import Any
 from solaar.i18n import _
 
 from . import common
+from . import exceptions
+from . import hidpp10
+from . import hidpp20
 from . import hidpp20_constants
 from . import settings_validator
 from .common import NamedInt
@@ -59,6 +65,7 @@ class Setting:
     validator_class = None
     validator_options = {}
     display = True  # display setting in UI
+    write_interval = 0.5  # minimum seconds between writes queued by write_later
 
     def __init__(self, device, rw, validator):
         self._device = device
@@ -66,6 +73,7 @@ class Setting:
         self._validator = validator
         self.kind = getattr(self._validator, "kind", None)
         self._value = None
+        self._initial = None  # the value read from the device before Solaar first applied one, see canaries_kept
 
     @classmethod
     def build(cls, device):
@@ -123,16 +131,18 @@ class Setting:
             return self._value
 
         if self._device.online:
-            reply = self._rw.read(self._device)
-            if reply:
-                self._value = self._validator.validate_read(reply)
-            if self._value is not None and self._device.persister and self.name not in self._device.persister:
-                # Don't update the persister if it already has a value,
-                # otherwise the first read might overwrite the value we wanted.
-                self._device.persister[self.name] = self._value if self.persist else None
-            if logger.isEnabledFor(logging.DEBUG):
-                logger.debug("%s: read value %r on %s", self.name, self._value, self._device)
-            return self._value
+            return self._read_reply(self._rw.read(self._device))
+
+    def _read_reply(self, reply):
+        if reply:
+            self._value = self._validator.validate_read(reply)
+        if self._value is not None and self._device.persister and self.name not in self._device.persister:
+            # Don't update the persister if it already has a value,
+            # otherwise the first read might overwrite the value we wanted.
+            self._device.persister[self.name] = self._value if self.persist else None
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s: read value %r on %s", self.name, self._value, self._device)
+        return self._value
 
     def _pre_write(self, save=True):
         # Remember the value we're trying to set, even if the write fails.
@@ -190,10 +200,12 @@ class Setting:
         try:
             value = self.read(self.persist)  # Don't use persisted value if setting doesn't persist
             if self.persist and value is not None:  # If setting doesn't persist no need to write value just read
-                self.write(value, save=False)
+                return self.write(value, save=False) is not None
+            return True
         except Exception as e:
             if logger.isEnabledFor(logging.WARNING):
                 logger.warning("%s: error applying %s so ignore it (%s): %s", self.name, self._value, self._device, repr(e))
+            return False
 
     def __str__(self):
         if hasattr(self, "_value"):
@@ -227,8 +239,8 @@ class Settings(Setting):
 
         if self._device.online:
             reply_map = {}
-            for key in self._validator.choices:
-                reply = self._rw.read(self._device, key)
+            keys = list(self._validator.choices)
+            for key, reply in zip(keys, _read_many(self._rw, self._device, keys)):
                 if reply:
                     reply_map[int(key)] = self._validator.validate_read(reply, key)
             self._value = reply_map
@@ -327,10 +339,9 @@ class LongSettings(Setting):
 
         if self._device.online:
             reply_map = {}
-            # Reading one item at a time. This can probably be optimised
-            for item in self._validator.items:
-                r = self._validator.prepare_read_item(item)
-                reply = self._rw.read(self._device, r)
+            items = list(self._validator.items)
+            reads = [self._validator.prepare_read_item(item) for item in items]
+            for item, reply in zip(items, _read_many(self._rw, self._device, reads)):
                 if reply:
                     reply_map[int(item)] = self._validator.validate_read_item(reply, item)
             self._value = reply_map
@@ -521,7 +532,8 @@ class BitFieldWithOffsetAndMaskSetting(BitFieldSetting):
     Needs to be instantiated for each specific device."""
 
     def _do_read(self):
-        return {r: self._rw.read(self._device, r) for r in self._validator.prepare_read()}
+        reads = list(self._validator.prepare_read())
+        return dict(zip(reads, _read_many(self._rw, self._device, reads)))
 
     def _do_read_key(self, key):
         r = self._validator.prepare_read_key(key)
@@ -596,6 +608,12 @@ class RangeFieldSetting(Setting):
 #
 
 
+def _read_many(rw, device, keys):
+    """Read several keys, in one pipelined batch if the reader/writer can do that."""
+    read_many = getattr(rw, "read_many", None)
+    return read_many(device, keys) if read_many else [rw.read(device, key) for key in keys]
+
+
 class RegisterRW:
     __slots__ = ("register",)
 
@@ -611,6 +629,12 @@ class RegisterRW:
     def write(self, device, data_bytes):
         return device.write_register(self.register, data_bytes)
 
+    def read_call(self, device):
+        return hidpp10.read_register_call(self.register)
+
+    def write_call(self, device, data_bytes):
+        return hidpp10.write_register_call(self.register, data_bytes)
+
 
 class FeatureRW:
     kind = NamedInt(0x02, _("feature"))
@@ -649,6 +673,24 @@ class FeatureRW:
         reply = device.feature_request(self.feature, self.write_fnid, write_bytes, no_reply=self.no_reply)
         return reply if not self.no_reply else True
 
+    def read_many(self, device, data_bytes_list):
+        """Read for each of several data bytes, pipelining the requests."""
+        if type(self).read is not FeatureRW.read or self.read_fnid is None:  # reads some other way
+            return [self.read(device, data_bytes) for data_bytes in data_bytes_list]
+        requests = [(self.read_fnid, self.prefix, self.read_prefix, data_bytes) for data_bytes in data_bytes_list]
+        return hidpp20.feature_request_many(device, self.feature, requests)
+
+    def read_call(self, device):
+        """The read as a request for request_many, None if it can't be made that way."""
+        if self.read_fnid is not None:
+            return hidpp20.feature_call(device, self.feature, self.read_fnid, self.prefix, self.read_prefix)
+
+    def write_call(self, device, data_bytes):
+        """The write as a request for request_many, None if it can't be made that way."""
+        if not self.no_reply:  # request_many waits for replies
+            data_bytes = data_bytes.to_bytes(1, "big") if isinstance(data_bytes, int) else data_bytes
+            return hidpp20.feature_call(device, self.feature, self.write_fnid, self.prefix + data_bytes + self.suffix)
+
 
 class FeatureRWMap(FeatureRW):
     kind = NamedInt(0x02, _("feature"))
@@ -676,6 +718,13 @@ class FeatureRWMap(FeatureRW):
         key_bytes = common.int2bytes(key, self.key_byte_count)
         return device.feature_request(self.feature, self.read_fnid, key_bytes)
 
+    def read_many(self, device, keys):
+        """Read several keys, pipelining the requests."""
+        if type(self).read is not FeatureRWMap.read:  # reads some other way
+            return [self.read(device, key) for key in keys]
+        requests = [(self.read_fnid, common.int2bytes(key, self.key_byte_count)) for key in keys]
+        return hidpp20.feature_request_many(device, self.feature, requests)
+
     def write(self, device, key, data_bytes):
         assert self.feature is not None
         key_bytes = common.int2bytes(key, self.key_byte_count)
@@ -856,14 +905,252 @@ class RawXYProcessing:
 
 
 def apply_all_settings(device):
-    if device.features and hidpp20_constants.SupportedFeature.HIRES_WHEEL in device.features:
-        time.sleep(0.2)  # delay to try to get out of race condition with Linux HID++ driver
+    """Push the settings of the device to it, returning whether all of them were applied."""
     persister = getattr(device, "persister", None)
     sensitives = persister.get("_sensitive", {}) if persister else {}
+    hires = []
+    others = []
     for s in device.settings:
         ignore = sensitives.get(s.name, False)
-        if ignore != SENSITIVITY_IGNORE:
-            s.apply()
+        if ignore == SENSITIVITY_IGNORE:
+            continue
+        if getattr(s, "feature", None) == hidpp20_constants.SupportedFeature.HIRES_WHEEL:
+            hires.append(s)
+        else:
+            others.append(s)
+    applied = _apply_settings(device, others)
+    # The Linux HID++ driver also sets up the wheel when the device connects, so apply these settings last.
+    # If the driver gets to the wheel after this, its replies show up and lead to reapply_if_changed.
+    return _apply_settings(device, hires) and applied
+
+
+def _plannable(setting):
+    """Whether applying the setting is just a read and a write of its register or feature, so it can be planned."""
+    cls = type(setting)
+    return (
+        cls.apply is Setting.apply
+        and cls.read is Setting.read
+        and cls.write is Setting.write
+        and type(setting._rw) in (FeatureRW, RegisterRW)
+    )
+
+
+def _target(setting):
+    """The register, or the feature and read function, that a simple setting reads and writes."""
+    rw = setting._rw
+    return rw.register if isinstance(rw, RegisterRW) else (rw.feature, rw.read_fnid)
+
+
+def _apply_settings(device, settings):
+    """Apply settings in order, making the reads and writes of runs of simple settings in pipelined batches.
+    A setting that changes only part of what it reads starts a new batch if an earlier one in the batch
+    writes the same register or feature, so that it reads what the earlier one wrote."""
+    applied = True
+    planned = []
+    targets = set()
+    for s in settings:
+        if device.online and _plannable(s):
+            if s._validator.needs_current_value and _target(s) in targets:
+                applied = _apply_planned(device, planned) and applied
+                planned = []
+                targets = set()
+            planned.append(s)
+            targets.add(_target(s))
+        else:
+            applied = _apply_planned(device, planned) and applied
+            planned = []
+            targets = set()
+            applied = s.apply() is not False and applied
+    return _apply_planned(device, planned) and applied
+
+
+def _apply_planned(device, settings):
+    """Apply simple settings with one pipelined batch of reads and one of writes, doing what Setting.apply does.
+    Returns whether all of them were applied."""
+    applied = True
+    planned = []
+    reads = {}  # setting => read request, None if the read can't be pipelined
+    for s in settings:
+        try:
+            s._pre_read(s.persist)
+            if not (s.persist and s._value is not None) or s.persist and s._validator.needs_current_value:
+                reads[s] = s._rw.read_call(device)
+            planned.append(s)
+        except Exception as e:
+            logger.warning("%s: error applying %s so ignore it (%s): %s", s.name, s._value, device, repr(e))
+            applied = False
+    if not planned:
+        return applied
+    replies, read_ok = _request_many(device, [r for r in reads.values() if r is not None])
+    applied = read_ok and applied
+    writes = {}  # setting => write request, or whether the write worked if it can't be pipelined
+    for s in planned:
+        try:
+            current = None
+            if s in reads:
+                current = next(replies) if reads[s] is not None else s._rw.read(device)
+                if current and s._initial is None:
+                    s._initial = s._validator.validate_read(current)
+                if not (s.persist and s._value is not None):
+                    s._read_reply(current)  # no value yet, so write back the value just read, as apply does
+            if s.persist and s._value is not None:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("%s: apply %r (%s)", s.name, s._value, device)
+                data_bytes = s._validator.prepare_write(s._value, current if s._validator.needs_current_value else None)
+                if data_bytes is not None:
+                    writes[s] = s._rw.write_call(device, data_bytes)
+                    if writes[s] is None:
+                        writes[s] = bool(s._rw.write(device, data_bytes))
+        except Exception as e:
+            logger.warning("%s: error applying %s so ignore it (%s): %s", s.name, s._value, device, repr(e))
+            applied = False
+    replies, write_ok = _request_many(device, [w for w in writes.values() if isinstance(w, tuple)])
+    applied = write_ok and applied
+    for s, w in writes.items():
+        if not (next(replies) if isinstance(w, tuple) else w):
+            logger.warning("%s: failed to apply %s (%s)", s.name, s._value, device)
+            applied = False
+    return applied
+
+
+def _request_many(device, requests):
+    """Make a batch of requests for _apply_planned, returning an iterator over the replies and whether none failed.
+    A device error is only logged, as Setting.apply does, leaving None for that reply."""
+    try:
+        return iter(device.request_many(requests)), True
+    except exceptions.FeatureCallError as e:
+        logger.warning("%s: error applying settings: %s", device, e)
+        return iter(e.replies), False
+
+
+def reapply_if_changed(device, feature):
+    """Write the applied values of the settings for a feature again if the device no longer has them."""
+    for s in device.settings:
+        if getattr(s, "feature", None) == feature:
+            _reapply_if_changed(s)
+
+
+def _reapply_if_changed(setting):
+    """Write the value of a setting again if the device no longer has it."""
+    if not setting.persist or setting._value is None or not setting._device.online:
+        return
+    try:
+        reply = setting._rw.read(setting._device)
+        if reply and setting._validator.validate_read(reply) != setting._value:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("%s: value changed on %s after being applied, applying again", setting.name, setting._device)
+            setting.write(setting._value, save=False)
+    except Exception as e:
+        if logger.isEnabledFor(logging.WARNING):
+            logger.warning("%s: error checking %s (%s): %s", setting.name, setting._value, setting._device, repr(e))
+
+
+def fingerprint(device):
+    """What applying all the settings of the device would write, to tell whether that changed since they were applied."""
+    persister = getattr(device, "persister", None)
+    sensitives = persister.get("_sensitive", {}) if persister else {}
+    return repr([(s.name, s._value, sensitives.get(s.name)) for s in device.settings])
+
+
+def canaries_kept(device, count=3):
+    """Whether the device still has the applied values of a few simple settings, read in one pipelined batch.
+    Only settings whose applied value differs from what the device had before are used, as a device that
+    lost its settings goes back to those values. Without such settings the device is taken to have lost them."""
+    persister = getattr(device, "persister", None)
+    sensitives = persister.get("_sensitive", {}) if persister else {}
+    canaries = [
+        s
+        for s in device.settings
+        if _plannable(s)
+        and s.persist
+        and s._value is not None
+        and s._initial is not None
+        and s._initial != s._value
+        and sensitives.get(s.name) != SENSITIVITY_IGNORE
+    ][:count]
+    reads = [s._rw.read_call(device) for s in canaries]
+    if not canaries or None in reads:
+        return False
+    try:
+        replies = device.request_many(reads)
+        return all(reply and s._validator.validate_read(reply) == s._value for s, reply in zip(canaries, replies))
+    except Exception as e:
+        logger.warning("%s: error reading canary settings: %s", device, repr(e))
+        return False
+
+
+def _write_now(setting, value, key=None, save=True):
+    try:
+        if key is None:
+            if hasattr(setting, "update"):
+                setting.update(value, save)  # the value was cached when queued so write wouldn't save it
+            return setting.write(value, save)
+        return setting.write_key_value(key, value, save)
+    except Exception as e:
+        logger.warning("%s: error writing %s (%s): %s", setting.name, value, setting._device, repr(e))
+
+
+class _CoalescingWriter:
+    """Writes settings from one thread, so that each setting or key of a setting is written at most
+    once every write_interval seconds and only the latest value queued for it is written."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._queue = []  # heap of (when, sequence number, (setting, key)) for pending writes
+        self._pending = {}  # (setting, key) => (value, save, callback), the latest value queued
+        self._written = weakref.WeakKeyDictionary()  # setting => {key: when it was last written}
+        self._count = 0
+        self._thread = None
+
+    def add(self, setting, value, key, save, callback):
+        item = (setting, key)
+        with self._cond:
+            # what is read from now on, such as by relative changes, builds on the value queued
+            if key is None:
+                setting._value = value
+            elif setting._value is not None:
+                setting._value[int(key)] = value
+            if item not in self._pending:
+                now = time.monotonic()
+                last = self._written.get(setting, {}).get(key)
+                when = now if last is None else max(now, last + getattr(setting, "write_interval", Setting.write_interval))
+                self._count += 1
+                heapq.heappush(self._queue, (when, self._count, item))
+            self._pending[item] = (value, save, callback)
+            if self._thread is None:
+                self._thread = threading.Thread(name="SettingWriter", target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue or self._queue[0][0] > time.monotonic():
+                    self._cond.wait(max(0.0, self._queue[0][0] - time.monotonic()) if self._queue else None)
+                _when, _count, item = heapq.heappop(self._queue)
+                value, save, callback = self._pending.pop(item)
+                setting, key = item
+                self._written.setdefault(setting, {})[key] = time.monotonic()
+            result = _write_now(setting, value, key, save)
+            with self._cond:
+                superseded = item in self._pending
+            if callback and not superseded:
+                try:
+                    callback(setting, result)
+                except Exception:
+                    logger.exception("write callback for %s", setting.name)
+
+
+_writer = _CoalescingWriter()
+
+
+def write_later(setting, value, key=None, save=True, callback=None):
+    """Write a value for a setting, or for a key of a setting, from a shared thread, coalescing quick changes.
+    Writes for the same setting and key are at least write_interval seconds apart and only the latest
+    value queued is written and saved. The cached value of the setting is the value queued right away.
+    callback(setting, result) is called after the write, unless another value is already waiting to be written.
+    Writes that have to happen in order with other writes, such as from rules, should use write instead."""
+    _writer.add(setting, value, key, save, callback)
 
 
 Setting.validator_class = settings_validator.BooleanValidator
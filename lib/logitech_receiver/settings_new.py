@@ -119,6 +119,7 @@ class Setting:
         except Exception as e:
             if logger.isEnabledFor(logging.WARNING):
                 logger.warning("%s: error applying %s so ignore it (%s): %s", self.name, value, self._device, repr(e))
+            return False
 
     @property
     def range(self):
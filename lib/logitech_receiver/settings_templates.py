@@ -762,6 +762,10 @@ class ReprogrammableKeys(settings.Settings):
             key_struct = device.keys[key_index]
             return b"\x00\x00" + common.int2bytes(int(key_struct.mapped_to), 2)
 
+        def read_many(self, device, keys):
+            device.keys.query_reporting()  # get the reporting of all the keys in one go
+            return [self.read(device, key) for key in keys]
+
         def write(self, device, key, data_bytes):
             key_index = device.keys.index(key)
             key_struct = device.keys[key_index]
@@ -803,9 +807,11 @@ class DpiSlidingXY(settings.RawXYProcessing):
 
     def setNewDpi(self, newDpiIdx):
         newDpi = self.dpiChoices[newDpiIdx]
-        self.dpiSetting.write(newDpi)
-        if self.device.setting_callback:
-            self.device.setting_callback(self.device, type(self.dpiSetting), [newDpi])
+        settings.write_later(self.dpiSetting, newDpi, callback=self._dpi_written)
+
+    def _dpi_written(self, setting, result):
+        if result is not None and self.device.setting_callback:
+            self.device.setting_callback(self.device, type(setting), [result])
 
     def displayNewDpi(self, newDpiIdx):
         selected_dpi = self.dpiChoices[newDpiIdx]
@@ -939,6 +945,10 @@ class DivertKeys(settings.Settings):
             key_struct = device.keys[key_index]
             return b"\x00\x00\x01" if MappingFlag.DIVERTED in key_struct.mapping_flags else b"\x00\x00\x00"
 
+        def read_many(self, device, keys):
+            device.keys.query_reporting()  # get the reporting of all the keys in one go
+            return [self.read(device, key) for key in keys]
+
         def write(self, device, key, data_bytes):
             key_index = device.keys.index(key)
             key_struct = device.keys[key_index]
@@ -1404,7 +1414,7 @@ class Gesture2Params(settings.LongSettings):
     class validator_class(settings_validator.MultipleRangeValidator):
         @classmethod
         def build(cls, setting_class, device):
-            params = _hidpp20.get_gestures(device).params.values()
+            params = device.gestures.params.values()
             items = [i for i in params if i.sub_params]
             if not items:
                 return None
@@ -1939,6 +1949,13 @@ SETTINGS: list[settings.Setting] = [
     ADCPower,
 ]
 
+# feature settings by feature, so that detection only looks at the settings for features a device has
+_FEATURE_SETTINGS = {}
+for _sclass in SETTINGS:
+    if _sclass.feature:
+        _FEATURE_SETTINGS.setdefault(_sclass.feature, []).append(_sclass)
+_SETTINGS_ORDER = {_sclass: _position for _position, _sclass in enumerate(SETTINGS)}
+
 
 class SettingsProtocol(Protocol):
     @property
@@ -2059,39 +2076,48 @@ def check_feature_settings(device, already_known) -> bool:
         return False
     if device.protocol and device.protocol < 2.0:
         return False
+    if _F.REPROG_CONTROLS_V4 in device.features:
+        try:  # read all the keys and their reporting together now instead of key by key later
+            if isinstance(device.keys, hidpp20.KeysArrayV4):
+                device.keys.query_reporting()
+        except exceptions.FeatureCallError as err:
+            logger.warning(f"{device}: could not read all the keys: {err}")
     absent = device.persister.get("_absent", []) if device.persister else []
     new_absent = []
-    for sclass in SETTINGS:
-        if sclass.feature:
-            known_present = device.persister and sclass.name in device.persister
-            if not any(s.name == sclass.name for s in already_known) and (known_present or sclass.name not in absent):
-                try:
-                    setting = check_feature(device, sclass)
-                except Exception as err:
-                    # on an internal HID++ error, assume offline and stop further checking
-                    if (
-                        isinstance(err, exceptions.FeatureCallError)
-                        and err.error == hidpp20_constants.ErrorCode.LOGITECH_ERROR
-                    ):
-                        logger.warning(f"HID++ internal error checking feature {sclass.name}: make device not present")
-                        device.online = False
-                        device.present = False
-                        return False
-                    else:
-                        logger.warning(f"ignore feature {sclass.name} because of error {err}")
-
-                if isinstance(setting, list):
-                    for s in setting:
-                        already_known.append(s)
-                    if sclass.name in new_absent:
-                        new_absent.remove(sclass.name)
-                elif setting:
-                    already_known.append(setting)
-                    if sclass.name in new_absent:
-                        new_absent.remove(sclass.name)
-                elif setting is None:
-                    if sclass.name not in new_absent and sclass.name not in absent and sclass.name not in device.persister:
-                        new_absent.append(sclass.name)
+    known = {s.name for s in already_known}
+    sclasses = [
+        sclass for feature, fsclasses in _FEATURE_SETTINGS.items() if feature in device.features for sclass in fsclasses
+    ]
+    for sclass in sorted(sclasses, key=_SETTINGS_ORDER.get):
+        known_present = device.persister and sclass.name in device.persister
+        if sclass.name not in known and (known_present or sclass.name not in absent):
+            try:
+                setting = check_feature(device, sclass)
+            except Exception as err:
+                # on an internal HID++ error, assume offline and stop further checking
+                if isinstance(err, exceptions.FeatureCallError) and err.error == hidpp20_constants.ErrorCode.LOGITECH_ERROR:
+                    logger.warning(f"HID++ internal error checking feature {sclass.name}: make device not present")
+                    device.online = False
+                    device.present = False
+                    return False
+                else:
+                    logger.warning(f"ignore feature {sclass.name} because of error {err}")
+                    continue
+
+            if isinstance(setting, list):
+                for s in setting:
+                    already_known.append(s)
+                    known.add(s.name)
+                if sclass.name in new_absent:
+                    new_absent.remove(sclass.name)
+            elif setting:
+                already_known.append(setting)
+                known.add(setting.name)
+                if sclass.name in new_absent:
+                    new_absent.remove(sclass.name)
+            elif setting is None:
+                if sclass.name not in new_absent and sclass.name not in absent and sclass.name not in device.persister:
+                    new_absent.append(sclass.name)
     if device.persister and new_absent:
         absent.extend(new_absent)
         device.persister["_absent"] = absent
@@ -0,0 +1,182 @@
+## Copyright (C) 2014-2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Persistent cache of information read from devices.
+
+Unlike the configuration this only holds data that can be read again from the device,
+so it is dropped whenever it was written by another version of Solaar or cannot be read.
+Entries are grouped in sections and keyed by the identity of the device that is known
+before talking to it: WPID and serial number for receiver-connected devices,
+product ID and HID serial number for directly connected devices.
+Devices that have not been seen for max_age seconds are forgotten, as are the least recently seen
+devices when more than max_entries of them are remembered.
+The Solaar application makes logitech_receiver use it by setting it as logitech_receiver.common.device_cache.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from solaar import __version__
+
+logger = logging.getLogger(__name__)
+
+_XDG_CACHE_HOME = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+_file_path = os.path.join(_XDG_CACHE_HOME, "solaar", "devices.json")
+
+_KEY_VERSION = "_version"
+_KEY_SEEN = "_seen"  # device key => when the device was last seen, in seconds since the epoch
+
+max_entries = 100  # how many devices are remembered
+max_age = 180 * 24 * 60 * 60  # seconds after which a device that has not been seen is forgotten
+
+_cache = None
+save_timer = None
+cache_lock = threading.Lock()
+
+
+def _load():
+    global _cache
+    loaded = {}
+    if os.path.isfile(_file_path):
+        try:
+            with open(_file_path) as cache_file:
+                loaded = json.load(cache_file)
+        except Exception as e:
+            logger.warning("failed to load cache from %s: %s", _file_path, e)
+    if not isinstance(loaded, dict) or loaded.get(_KEY_VERSION) != __version__:
+        loaded = {}
+    loaded[_KEY_VERSION] = __version__
+    _cache = loaded
+    _evict(int(time.time()))
+
+
+def _sections():
+    return [entries for section, entries in _cache.items() if section != _KEY_SEEN and isinstance(entries, dict)]
+
+
+def _evict(now):
+    """Forget devices that have not been seen for max_age, then the least recently seen beyond max_entries."""
+    seen = _cache.setdefault(_KEY_SEEN, {})
+    for entries in _sections():
+        for key in entries:
+            seen.setdefault(key, now)
+    by_age = sorted(seen, key=seen.get)
+    gone = [key for key in by_age if now - seen[key] > max_age]
+    gone.extend(by_age[len(gone) : max(len(gone), len(by_age) - max_entries)])
+    for key in gone:
+        _forget(key)
+    return bool(gone)
+
+
+def _forget(key):
+    found = _cache.get(_KEY_SEEN, {}).pop(key, None) is not None
+    for entries in _sections():
+        found = entries.pop(key, None) is not None or found
+    return found
+
+
+def device_key(device):
+    """The key for a device, or None if the device can't be identified without talking to it."""
+    serial = getattr(device, "_serial", None) or getattr(device, "hid_serial", None)
+    model = getattr(device, "wpid", None) or getattr(device, "product_id", None)
+    if model and serial:
+        return f"{model}:{serial}"
+
+
+def get(section, key):
+    if key is None:
+        return None
+    with cache_lock:
+        if _cache is None:
+            _load()
+        value = _cache.get(section, {}).get(key)
+        if value is not None:
+            _cache[_KEY_SEEN][key] = int(time.time())
+        return value
+
+
+def put(section, key, value):
+    if key is None:
+        return
+    with cache_lock:
+        if _cache is None:
+            _load()
+        _cache.setdefault(section, {})[key] = value
+        now = int(time.time())
+        new, _cache[_KEY_SEEN][key] = key not in _cache[_KEY_SEEN], now
+        if new:
+            _evict(now)
+    save(defer=True)
+
+
+def remove(section, key):
+    if key is None:
+        return
+    with cache_lock:
+        if _cache is None:
+            _load()
+        found = _cache.get(section, {}).pop(key, None) is not None
+    if found:
+        save(defer=True)
+
+
+def forget(key):
+    """Forget everything about a device, for when it is unpaired."""
+    if key is None:
+        return
+    with cache_lock:
+        if _cache is None:
+            _load()
+        found = _forget(key)
+    if found:
+        save(defer=True)
+
+
+def save(defer=False):
+    global save_timer
+    if not _cache:
+        return
+    if not defer:
+        do_save()
+    else:
+        with cache_lock:
+            if not save_timer:
+                save_timer = threading.Timer(5.0, do_save)
+                save_timer.daemon = True
+                save_timer.start()
+
+
+def do_save():
+    global save_timer
+    with cache_lock:
+        if save_timer:
+            save_timer.cancel()
+            save_timer = None
+        if not _cache:
+            return
+        dirname = os.path.dirname(_file_path)
+        try:
+            os.makedirs(dirname, exist_ok=True)
+            temp_path = _file_path + ".tmp"
+            with open(temp_path, "w") as cache_file:
+                json.dump(_cache, cache_file, separators=(",", ":"))
+            os.replace(temp_path, _file_path)
+            logger.debug("saved cache to %s", _file_path)
+        except Exception as e:
+            logger.error("failed to save cache to %s: %s", _file_path, e)
@@ -41,6 +41,7 @@ _KEY_UNIT_ID = "_unitId"
 _KEY_ABSENT = "_absent"
 _KEY_SENSITIVE = "_sensitive"
 _config = []
+_index = {}  # (wpid, serial) and (modelId, unitId) => device entries with them, in configuration order
 
 
 def _load():
@@ -65,6 +66,18 @@ def _load():
     logger.debug("load => %s", loaded_config)
     global _config
     _config = _parse_config(loaded_config, path)
+    _index.clear()
+    for entry in _config:
+        if isinstance(entry, _DeviceEntry):
+            _index_entry(entry)
+
+
+def _index_entry(entry):
+    for key in ((entry.get(_KEY_WPID), entry.get(_KEY_SERIAL)), (entry.get(_KEY_MODEL_ID), entry.get(_KEY_UNIT_ID))):
+        if all(key):
+            entries = _index.setdefault(key, [])
+            if not any(e is entry for e in entries):
+                entries.append(entry)
 
 
 def _parse_config(loaded_config, config_path):
@@ -242,8 +255,11 @@ def persister(device):
         # some devices report modelId and unitId as zero so use name and serial for them
         modelId = device.modelId if device.modelId != "000000000000" else device._name if device.modelId else None
         unitId = device.unitId if device.modelId != "000000000000" else device._serial if device.unitId else None
-        for c in _config:
-            if isinstance(c, _DeviceEntry) and match(device.wpid, device._serial, modelId, unitId, c):
+        candidates = _index.get((device.wpid, device._serial), []) + _index.get((modelId, unitId), [])
+        if len(candidates) > 1:  # use the first matching entry in the configuration
+            candidates.sort(key=_position)
+        for c in candidates:
+            if match(device.wpid, device._serial, modelId, unitId, c):
                 entry = c
                 break
         if not entry:
@@ -254,8 +270,13 @@ def persister(device):
             entry = _DeviceEntry()
             _config.append(entry)
         entry.update(device.name, device.wpid, device.serial, modelId, unitId)
+        _index_entry(entry)
         return entry
 
 
+def _position(entry):
+    return next(i for i, c in enumerate(_config) if c is entry)
+
+
 def attach_to(device):
     pass
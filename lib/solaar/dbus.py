@@ -79,7 +79,7 @@ _bluetooth_callbacks = {}
 
 def watch_bluez_connect(serial, callback=None):
     if _bluetooth_callbacks.get(serial):
-        _bluetooth_callbacks.get(serial).remove()
+        _bluetooth_callbacks.pop(serial).remove()
     path = _BLUETOOTH_PATH_PREFIX + serial.replace(":", "_").upper()
     if bus is not None and callback is not None:
         _bluetooth_callbacks[serial] = bus.add_signal_receiver(
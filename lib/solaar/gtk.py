@@ -29,8 +29,11 @@ import tempfile
 
 from traceback import format_exc
 
+import logitech_receiver.common
+
 from solaar import NAME
 from solaar import __version__
+from solaar import cache
 from solaar import cli
 from solaar import configuration
 from solaar import dbus
@@ -196,6 +199,7 @@ def main():
             dbus.watch_suspend_resume(lambda: listener.ping_all(True))
 
         configuration.defer_saves = True  # allow configuration saves to be deferred
+        logitech_receiver.common.device_cache = cache  # remember information read from devices between runs
 
         # main UI event loop
         ui.run_loop(listener.start_all, listener.stop_all, args.window != "only", args.window != "hide")
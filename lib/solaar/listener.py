@@ -20,9 +20,11 @@ from __future__ import annotations
 import errno
 import logging
 import subprocess
+import threading
 import time
 import typing
 
+from collections import OrderedDict
 from collections import namedtuple
 from functools import partial
 from typing import Callable
@@ -35,10 +37,13 @@ from logitech_receiver import exceptions
 from logitech_receiver import hidpp10_constants
 from logitech_receiver import listener
 from logitech_receiver import notifications
+from logitech_receiver import presence
 
+from . import cache
 from . import configuration
 from . import dbus
 from . import i18n
+from .tasks import TaskRunner
 from .ui import common
 
 if typing.TYPE_CHECKING:
@@ -68,10 +73,11 @@ def _ghost(device):
 class SolaarListener(listener.EventsListener):
     """Keeps the status of a Receiver or Device (member name is receiver but it can also be a device)."""
 
-    def __init__(self, receiver, status_changed_callback):
+    def __init__(self, receiver, status_changed_callback, identity=None):
         assert status_changed_callback
         super().__init__(receiver, self._notifications_handler)
         self.status_changed_callback = status_changed_callback
+        self.identity = identity  # for devices that are kept to be rebound when they come back
         receiver.status_callback = self._status_changed
 
     def has_started(self):
@@ -87,12 +93,20 @@ class SolaarListener(listener.EventsListener):
         self._status_changed(self.receiver)
 
     def has_stopped(self):
+        rebound = self.rebound()
         r, self.receiver = self.receiver, None
         assert r is not None
         logger.info("%s: notifications listener has stopped", r)
 
-        # because udev is not notifying us about device removal, make sure to clean up in _all_listeners
-        _all_listeners.pop(r.path, None)
+        # udev may not tell about the removal, so make sure to clean up in _all_listeners
+        with _listeners_lock:
+            if _all_listeners.get(self._handle.path) is self:
+                del _all_listeners[self._handle.path]
+
+        if rebound:  # the device came back on a new node before this listener stopped, so leave it alone
+            logger.info("%s: back on %s before the listener for %s stopped", r, r.path, self._handle.path)
+            self._handle.close()
+            return
 
         # this causes problems but what is it doing (pfps) - r.status = _('The receiver was unplugged.')
         if r:
@@ -100,6 +114,8 @@ class SolaarListener(listener.EventsListener):
                 r.close()
             except Exception:
                 logger.exception(f"closing receiver {r.path}")
+        if self.identity:
+            _depart(self.identity, r)
         self.status_changed_callback(r)
 
     def _status_changed(self, device, alert=None, reason=None):
@@ -115,7 +131,6 @@ class SolaarListener(listener.EventsListener):
                         reason or "",
                     )
                 else:
-                    device.ping()
                     logger.info(
                         "status_changed %r: %s %s (%X) %s",
                         device,
@@ -226,7 +241,7 @@ class SolaarListener(listener.EventsListener):
             logger.info("%s: pairing detected new device", self.receiver)
             self.receiver.pairing.new_device = dev
         elif dev.online is None:
-            dev.ping()
+            presence.check(dev)
 
     def __str__(self):
         return f"<SolaarListener({self.receiver.path},{self.receiver.handle})>"
@@ -253,13 +268,53 @@ def _cleanup_bluez_dbus(device: Device):
 
 
 _all_listeners = {}  # all known receiver listeners, listeners that stop on their own may remain here
+_listeners_lock = threading.Lock()  # _all_listeners is changed from the hotplug runner and listener threads
+
+_DEPARTED_MAX = 8  # how many Bluetooth devices that went away are kept
+_departed = OrderedDict()  # (bus, vendor, product, serial) => Bluetooth device that went away, to rebind when it is back
+_departed_lock = threading.Lock()  # _departed is changed from the hotplug runner and listener threads
+_STOP_WAIT = 3.0  # seconds to wait for the listener of a device that went away to stop
+
+
+def _identity(device_info: DeviceInfo):
+    if device_info.isDevice and device_info.bus_id == 0x0005 and device_info.serial:
+        return device_info.bus_id, device_info.vendor_id, device_info.product_id, device_info.serial
+
+
+def _depart(identity, device):
+    with _departed_lock:
+        _departed[identity] = device
+        _departed.move_to_end(identity)
+        while len(_departed) > _DEPARTED_MAX:
+            _departed.popitem(last=False)
+
+
+def _rebind(identity, device_info: DeviceInfo):
+    """A Bluetooth device that wakes up gets a new node, so rebind it instead of setting it up again."""
+    with _departed_lock:
+        device = _departed.pop(identity, None)
+    if device is None:
+        return None
+    handle = base.open_path(device_info.path)
+    if not handle:
+        return None
+    if device.rebind(handle, device_info):
+        logger.info("%s came back on %s", device, device_info.path)
+        return device
+    logger.info("%s changed while it was away, setting it up again", device)
+    device.close()
 
 
 def _start(device_info: DeviceInfo):
     assert _status_callback and _setting_callback
 
+    identity = _identity(device_info)
+    rebound = _rebind(identity, device_info) if identity else None
     if not device_info.isDevice:
         receiver_ = logitech_receiver.receiver.create_receiver(base, device_info, _setting_callback)
+    elif rebound:
+        receiver_ = rebound
+        dbus.watch_bluez_connect(receiver_.hid_serial, partial(_process_bluez_dbus, receiver_))
     else:
         receiver_ = logitech_receiver.device.create_device(base, device_info, _setting_callback)
         if receiver_:
@@ -269,9 +324,12 @@ def _start(device_info: DeviceInfo):
                 receiver_.cleanups.append(_cleanup_bluez_dbus)
 
     if receiver_:
-        rl = SolaarListener(receiver_, _status_callback)
+        rl = SolaarListener(receiver_, _status_callback, identity)
         rl.start()
-        _all_listeners[device_info.path] = rl
+        with _listeners_lock:
+            previous, _all_listeners[device_info.path] = _all_listeners.get(device_info.path), rl
+        if previous is not None:
+            previous.stop()
         return rl
 
     logger.warning("failed to open %s", device_info)
@@ -281,31 +339,42 @@ def start_all():
     stop_all()  # just in case this it called twice in a row...
     logger.info("starting receiver listening threads")
     for device_info in base.receivers_and_devices():
-        _process_receiver_event(ACTION_ADD, device_info)
+        _queue_receiver_event(ACTION_ADD, device_info)  # in order with hotplug events for the same paths
 
 
 def stop_all():
-    listeners = list(_all_listeners.values())
-    _all_listeners.clear()
+    with _listeners_lock:
+        listeners = list(_all_listeners.values())
+        _all_listeners.clear()
     if listeners:
         logger.info("stopping receiver listening threads %s", listeners)
         for listener_thread in listeners:
             listener_thread.stop()
     configuration.save()
+    cache.save()
     if listeners:
         for listener_thread in listeners:
             listener_thread.join()
 
 
+def _is_online(device, resuming):
+    # after a resume nothing heard before the suspend says anything about the device
+    return device.ping() if resuming else presence.check(device)
+
+
 # after a resume, the device may have been off so mark its saved status to ensure
 # that the status is pushed to the device when it comes back
 def ping_all(resuming=False):
     logger.info("ping all devices%s", " when resuming" if resuming else "")
-    for listener_thread in _all_listeners.values():
+    with _listeners_lock:
+        listeners = list(_all_listeners.values())
+    for listener_thread in listeners:
+        if listener_thread.receiver is None:  # stopped since
+            continue
         if listener_thread.receiver.isDevice:
             if resuming:
                 listener_thread.receiver._active = None  # ensure that settings are pushed
-            if listener_thread.receiver.ping():
+            if _is_online(listener_thread.receiver, resuming):
                 listener_thread.receiver.changed(active=True, push=True)
             listener_thread._status_changed(listener_thread.receiver)
         else:
@@ -314,7 +383,7 @@ def ping_all(resuming=False):
                 for dev in listener_thread.receiver:
                     if resuming:
                         dev._active = None  # ensure that settings are pushed
-                    if dev.ping():
+                    if _is_online(dev, resuming):
                         dev.changed(active=True, push=True)
                     listener_thread._status_changed(dev)
                     count -= 1
@@ -325,15 +394,18 @@ def ping_all(resuming=False):
 _status_callback = None  # GUI callback to change UI in response to changes to receiver or device status
 _setting_callback = None  # GUI callback to change UI in response to changes to status
 _error_callback = None  # GUI callback to report errors
+_hotplug_runner = None  # opens and starts receivers and devices from hotplug events off the GLib main thread
 
 
 def setup_scanner(status_changed_callback: Callable, setting_changed_callback: Callable, error_callback: Callable):
-    global _status_callback, _error_callback, _setting_callback
+    global _status_callback, _error_callback, _setting_callback, _hotplug_runner
     assert _status_callback is None, "scanner was already set-up"
     _status_callback = status_changed_callback
     _setting_callback = setting_changed_callback
     _error_callback = error_callback
-    base.notify_on_receivers_glib(GLib, _process_receiver_event)
+    _hotplug_runner = TaskRunner("Hotplug", maxsize=0)  # the GLib thread must never wait to queue an event
+    _hotplug_runner.start()
+    base.notify_on_receivers_glib(GLib, _queue_receiver_event)
 
 
 def _process_add(device_info: DeviceInfo, retry):
@@ -347,7 +419,7 @@ def _process_add(device_info: DeviceInfo, retry):
             except Exception:
                 pass
             if retry:
-                GLib.timeout_add(2000.0, _process_add, device_info, retry - 1)
+                GLib.timeout_add(2000.0, _queue_add, device_info, retry - 1)
             else:
                 _error_callback(common.ErrorReason.PERMISSIONS, device_info.path)
         else:
@@ -356,6 +428,23 @@ def _process_add(device_info: DeviceInfo, retry):
         _error_callback(common.ErrorReason.NO_DEVICE, device_info.path)
 
 
+def _queue_add(device_info: DeviceInfo, retry):
+    if _hotplug_runner:
+        _hotplug_runner(_process_add, device_info, retry)
+    else:
+        _process_add(device_info, retry)
+    return False
+
+
+def _queue_receiver_event(action, device_info):
+    """Called on the GLib thread, hands the (slow) receiver or device start-up to the hotplug runner."""
+    if _hotplug_runner:
+        _hotplug_runner(_process_receiver_event, action, device_info)
+    else:
+        _process_receiver_event(action, device_info)
+    return False
+
+
 # receiver add/remove events will start/stop listener threads
 def _process_receiver_event(action, device_info):
     assert action is not None
@@ -363,10 +452,17 @@ def _process_receiver_event(action, device_info):
     assert _error_callback
     logger.info("receiver event %s %s", action, device_info)
     # whatever the action, stop any previous receivers at this path
-    listener_thread = _all_listeners.pop(device_info.path, None)
+    with _listeners_lock:
+        listener_thread = _all_listeners.pop(device_info.path, None)
     if listener_thread is not None:
         assert isinstance(listener_thread, SolaarListener)
+        device = listener_thread.receiver
         listener_thread.stop()
+        if listener_thread.identity and device is not None:
+            # the device can come back before its listener notices, so it has to be rebindable right away,
+            # and the listener should be done with it before it is rebound - one that stops later leaves it alone
+            _depart(listener_thread.identity, device)
+            listener_thread.join(_STOP_WAIT)
     if action == ACTION_ADD:
         _process_add(device_info, 3)
     return False
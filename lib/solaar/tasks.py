@@ -29,10 +29,10 @@ except ImportError:
 
 
 class TaskRunner(Thread):
-    def __init__(self, name):
+    def __init__(self, name, maxsize=16):
         super().__init__(name=name)
         self.daemon = True
-        self.queue = Queue(16)
+        self.queue = Queue(maxsize)  # 0 for no limit, so that adding tasks never blocks
         self.alive = False
 
     def __call__(self, function, *args, **kwargs):
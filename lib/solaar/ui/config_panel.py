@@ -18,7 +18,6 @@
 import logging
 
 from enum import Enum
-from threading import Timer
 
 import gi
 
@@ -82,6 +81,23 @@ def _write_async(setting, value, sbox, sensitive=True, key=None):
     ui_async(_do_write, setting, value, sbox, key)
 
 
+def _write_coalesced(setting, value, sbox, key=None):
+    """Write a value that keeps changing, such as from a slider, leaving the control usable meanwhile."""
+
+    def _written(_s, v):
+        GLib.idle_add(_coalesced_written, sbox, v, priority=99)
+
+    sbox._failed.set_visible(False)
+    sbox._spinner.set_visible(True)
+    sbox._spinner.start()
+    settings.write_later(setting, value, key=key, callback=_written)
+
+
+def _coalesced_written(sbox, value):
+    sbox._spinner.stop()
+    sbox._failed.set_visible(value is None)
+
+
 class ComboBoxText(Gtk.ComboBoxText):
     def get_value(self):
         return int(self.get_active_id())
@@ -139,7 +155,6 @@ class SliderControl(Gtk.Scale, Control):
     def __init__(self, sbox, delegate=None):
         super().__init__(halign=Gtk.Align.FILL)
         self.init(sbox, delegate)
-        self.timer = None
         self.set_range(*self.sbox.setting.range)
         self.set_round_digits(0)
         self.set_digits(0)
@@ -156,14 +171,7 @@ class SliderControl(Gtk.Scale, Control):
 
     def changed(self, *args):
         if self.get_sensitive():
-            if self.timer:
-                self.timer.cancel()
-            self.timer = Timer(0.5, lambda: GLib.idle_add(self.do_change))
-            self.timer.start()
-
-    def do_change(self):
-        self.timer.cancel()
-        self.update()
+            _write_coalesced(self.sbox.setting, self.get_value(), self.sbox)
 
 
 def _create_choice_control(sbox, delegate=None, choices=None):
@@ -454,18 +462,10 @@ class MultipleRangeControl(MultipleControl):
 
     def changed(self, control, item, sub_item):
         if control.get_sensitive():
-            if hasattr(control, "_timer"):
-                control._timer.cancel()
-            control._timer = Timer(0.5, lambda: GLib.idle_add(self._write, control, item, sub_item))
-            control._timer.start()
-
-    def _write(self, control, item, sub_item):
-        control._timer.cancel()
-        delattr(control, "_timer")
-        new_state = int(control.get_value())
-        if self.sbox.setting._value[int(item)][str(sub_item)] != new_state:
-            self.sbox.setting._value[int(item)][str(sub_item)] = new_state
-            _write_async(self.sbox.setting, self.sbox.setting._value[int(item)], self.sbox, key=int(item))
+            new_state = int(control.get_value())
+            if self.sbox.setting._value[int(item)][str(sub_item)] != new_state:
+                self.sbox.setting._value[int(item)][str(sub_item)] = new_state
+                _write_coalesced(self.sbox.setting, self.sbox.setting._value[int(item)], self.sbox, key=int(item))
 
     def set_value(self, value):
         if value is None:
@@ -514,18 +514,10 @@ class PackedRangeControl(MultipleRangeControl):
 
     def changed(self, control, item):
         if control.get_sensitive():
-            if hasattr(control, "_timer"):
-                control._timer.cancel()
-            control._timer = Timer(0.5, lambda: GLib.idle_add(self._write, control, item))
-            control._timer.start()
-
-    def _write(self, control, item):
-        control._timer.cancel()
-        delattr(control, "_timer")
-        new_state = int(control.get_value())
-        if self.sbox.setting._value[int(item)] != new_state:
-            self.sbox.setting._value[int(item)] = new_state
-            _write_async(self.sbox.setting, self.sbox.setting._value[int(item)], self.sbox, key=int(item))
+            new_state = int(control.get_value())
+            if self.sbox.setting._value[int(item)] != new_state:
+                self.sbox.setting._value[int(item)] = new_state
+                _write_coalesced(self.sbox.setting, self.sbox.setting._value[int(item)], self.sbox, key=int(item))
 
     def set_value(self, value):
         if value is None:
@@ -598,7 +590,7 @@ class HeteroKeyControl(Gtk.HBox, Control):
     def set_value(self, value):
         self.set_sensitive(False)
         if value is not None:
-            for k, v in value.__dict__.items():
+            for k, v in value.as_dict().items():
                 if k in self._items:
                     (lblbox, box) = self._items[k]
                     if isinstance(box, Gtk.ColorButton):
@@ -624,17 +616,9 @@ class HeteroKeyControl(Gtk.HBox, Control):
         if self.get_sensitive() and control.get_sensitive():
             if "ID" in self._items and control == self._items["ID"][1]:
                 self.setup_visibles(int(self._items["ID"][1].get_value()))
-            if hasattr(control, "_timer"):
-                control._timer.cancel()
-            control._timer = Timer(0.3, lambda: GLib.idle_add(self._write, control))
-            control._timer.start()
-
-    def _write(self, control):
-        control._timer.cancel()
-        delattr(control, "_timer")
-        new_state = self.get_value()
-        if self.sbox.setting._value != new_state:
-            _write_async(self.sbox.setting, new_state, self.sbox)
+            new_state = self.get_value()
+            if self.sbox.setting._value != new_state:
+                _write_coalesced(self.sbox.setting, new_state, self.sbox)
 
 
 _allowables_icons = {True: "changes-allow", False: "changes-prevent", settings.SENSITIVITY_IGNORE: "dialog-error"}
@@ -1,5 +1,8 @@
+import pytest
+
 from hid_parser.data import Button
 from hid_parser.data import Consumer
+from hid_parser.data import _Data
 
 
 def test_consumer():
@@ -13,3 +16,23 @@ def test_button():
 
     assert button.NO_BUTTON == 0x0
     assert button.BUTTON_1 == 0x1
+
+
+def test_tables_built_on_first_lookup():
+    class Sample(_Data):
+        FIRST = 0x01, "First"
+        RANGE = 0x10, ..., 0x1F, "Range"
+
+    assert "_single" not in Sample.__dict__
+    assert Sample.get_description(0x12) == "Range"
+    assert Sample.FIRST == 0x01
+    assert Sample.RANGE == range(0x10, 0x20)
+
+
+def test_duplicated_value_raises_on_lookup():
+    class Sample(_Data):
+        FIRST = 0x01, "First"
+        RANGE = 0x00, ..., 0x02, "Range"
+
+    with pytest.raises(ValueError):
+        Sample.get_description(0x01)
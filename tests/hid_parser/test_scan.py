@@ -0,0 +1,90 @@
+import warnings
+
+import pytest
+
+from hid_parser import InvalidReportDescriptor
+from hid_parser import ReportDescriptor
+from hid_parser import Usage
+from hid_parser import scan_report_sizes
+
+# vendor collections for HID++ short (0x10) and long (0x11) reports, as in Logitech receivers
+HIDPP_DESCRIPTOR = bytes.fromhex(
+    "0600ff0901a101851075089506150026ff000901810009019100c00600ff0902a101851175089513150026ff000902810009029100c0"
+)
+# a mouse with buttons, padding, and relative X/Y axes
+MOUSE_DESCRIPTOR = bytes.fromhex(
+    "05010902a101850209010500a100050919012903150025019503750181029501750581030501093009311681f8257f751095028106c0c0"
+)
+
+
+@pytest.mark.parametrize("descriptor", [HIDPP_DESCRIPTOR, MOUSE_DESCRIPTOR, HIDPP_DESCRIPTOR + MOUSE_DESCRIPTOR])
+def test_scan_report_sizes_matches_full_parse(descriptor):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        rd = ReportDescriptor(descriptor)
+
+    input_sizes, output_sizes = scan_report_sizes(descriptor)
+
+    assert sorted(input_sizes) == sorted(rd.input_report_ids)
+    assert sorted(output_sizes) == sorted(rd.output_report_ids)
+    for report_id, size in input_sizes.items():
+        assert size == int(rd.get_input_report_size(report_id))
+    for report_id, size in output_sizes.items():
+        assert size == int(rd.get_output_report_size(report_id))
+
+
+def test_scan_report_sizes_hidpp():
+    input_sizes, output_sizes = scan_report_sizes(HIDPP_DESCRIPTOR)
+
+    assert input_sizes == {0x10: 6 * 8, 0x11: 19 * 8}
+    assert output_sizes == {0x10: 6 * 8, 0x11: 19 * 8}
+
+
+def test_scan_report_sizes_truncated():
+    with pytest.raises(InvalidReportDescriptor):
+        scan_report_sizes(HIDPP_DESCRIPTOR[:-2])
+
+
+def _report_descriptor(descriptor):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return ReportDescriptor(descriptor)
+
+
+def test_compile_input_report_bit_fields():
+    rd = _report_descriptor(MOUSE_DESCRIPTOR)
+
+    extract = rd.compile_input_report(0x02)
+
+    assert extract is rd.compile_input_report(0x02)
+    assert len(extract.usages) == 5
+    assert extract.usages[3] == Usage(0x01, 0x30)
+    assert extract(b"\x02\x05\xff\xff\x10\x00") == (1, 0, 1, -1, 16)
+    assert extract(b"\x02\x02\x00\x80\xff\x7f") == (0, 1, 0, -32768, 32767)
+
+
+def test_compile_input_report_aligned_fields():
+    rd = _report_descriptor(HIDPP_DESCRIPTOR)
+
+    extract = rd.compile_input_report(0x10)
+
+    assert extract.usages == (None,) * 6
+    assert int(extract.size) == 6 * 8
+    assert extract(b"\x10\xff\x00\x11\x22\x33\x44") == (0xFF, 0x00, 0x11, 0x22, 0x33, 0x44)
+    with pytest.raises(ValueError):
+        extract(b"\x10\xff\x00")
+
+
+@pytest.mark.parametrize(
+    "limits, expected",
+    [
+        ("15f6262c01", (-10,)),  # one byte minimum of -10, two byte maximum of 300
+        ("150026ffff", (0xFFF6,)),  # two byte maximum of 65535 with a minimum of 0
+    ],
+)
+def test_compile_input_report_limit_sizes(limits, expected):
+    rd = _report_descriptor(bytes.fromhex("05010902a10185030930" + limits + "751095018102c0"))
+
+    extract = rd.compile_input_report(0x03)
+
+    assert extract(b"\x03\xf6\xff") == expected
@@ -10,3 +10,71 @@ else:
 
 def test_find_paired_node():
     hidapi.enumerate(mock.Mock())
+
+
+def _udev_device(node):
+    return mock.Mock(device_node=node, sys_path=f"/sys/class/hidraw/{node}")
+
+
+def test_hotplug_worker_coalesces_per_node(mocker):
+    if platform.system() != "Linux":
+        return
+    glib = mock.Mock()
+    callback = mock.Mock()
+    match = mocker.patch.object(hidapi, "_match", side_effect=lambda action, device, filter_func: device.device_node)
+    worker = hidapi._HotplugWorker(glib, callback, mock.Mock(), debounce=1.0)
+    worker.push(hidapi.ACTION_ADD, _udev_device("/dev/hidraw1"))
+    worker.push(hidapi.ACTION_REMOVE, _udev_device("/dev/hidraw1"))
+    worker.push(hidapi.ACTION_ADD, _udev_device("/dev/hidraw1"))
+    worker.push(hidapi.ACTION_ADD, _udev_device("/dev/hidraw2"))
+    worker.push(hidapi.ACTION_REMOVE, _udev_device("/dev/hidraw2"))
+
+    assert worker.take_due(0) == []
+    due = worker.take_due(hidapi.time() + 2.0)
+    for action, device in due:
+        worker.process(action, device)
+
+    assert len(due) == 2
+    assert match.call_count == 1
+    assert glib.idle_add.call_args_list == [
+        mock.call(callback, hidapi.ACTION_ADD, "/dev/hidraw1"),
+        mock.call(callback, hidapi.ACTION_REMOVE, hidapi._removed("/dev/hidraw2")),  # removes aren't matched
+    ]
+    assert worker.take_due(hidapi.time() + 2.0) == []
+
+
+def test_open_path_waits_for_udev(mocker):
+    if platform.system() != "Linux":
+        return
+    denied = OSError(hidapi.errno.EACCES, "Permission denied")
+    os_open = mocker.patch.object(hidapi.os, "open", side_effect=[denied, 7])
+    wait = mocker.patch.object(hidapi, "_wait_for_udev", return_value=True)
+
+    assert hidapi.open_path("/dev/hidraw3") == 7
+    assert os_open.call_count == 2
+    wait.assert_called_once_with("/dev/hidraw3")
+
+
+def test_open_path_permission_denied(mocker):
+    if platform.system() != "Linux":
+        return
+    denied = OSError(hidapi.errno.EACCES, "Permission denied")
+    os_open = mocker.patch.object(hidapi.os, "open", side_effect=denied)
+    mocker.patch.object(hidapi, "_wait_for_udev", return_value=False)
+
+    assert hidapi.open_path("/dev/hidraw3") is None
+    assert os_open.call_count == 1
+
+
+def test_open_path_retries_once(mocker):
+    if platform.system() != "Linux":
+        return
+    denied = OSError(hidapi.errno.EACCES, "Permission denied")
+    os_open = mocker.patch.object(hidapi.os, "open", side_effect=denied)
+    mocker.patch.object(hidapi.pyudev, "Context")
+    mocker.patch.object(hidapi.pyudev, "Monitor")
+    devices = mocker.patch.object(hidapi.pyudev, "Devices")
+    devices.from_device_file.return_value.is_initialized = True  # udev finished before the monitor started
+
+    assert hidapi.open_path("/dev/hidraw3") is None
+    assert os_open.call_count == 2
@@ -63,6 +63,10 @@ def request(
             return bytes.fromhex(r.response) if r.response is not None else None
 
 
+def request_many(responses, handle, devnumber, requests, **kwargs):
+    return [request(responses, handle, devnumber, *r, **kwargs) for r in requests]
+
+
 @dataclass
 class Response:
     response: str | float
@@ -386,7 +390,7 @@ class Device:
     version: Optional[int] = 0
     wpid: Optional[str] = "0000"
     setting_callback: Any = None
-    sliding = profiles = _backlight = _keys = _remap_keys = _led_effects = _gestures = None
+    sliding = profiles = _backlight = _keys = _remap_keys = _led_effects = _gestures = _snapshot = None
     _gestures_lock = threading.Lock()
     number = "d1"
     present = True
@@ -400,6 +404,9 @@ class Device:
     gestures = device.Device.gestures
     __hash__ = device.Device.__hash__
     feature_request = device.Device.feature_request
+    _from_snapshot = device.Device._from_snapshot
+    _to_snapshot = device.Device._to_snapshot
+    forget = device.Device.forget
 
     def __post_init__(self):
         self._name = self.name
@@ -434,6 +441,9 @@ class Device:
                 return bytes.fromhex(r.response) if isinstance(r.response, str) else r.response
         print("RESPONSE", self._name, None)
 
+    def request_many(self, requests):
+        return [self.request(*r) for r in requests]
+
     def ping(self, handle=None, devnumber=None, long_message=False):
         print("PING", self._protocol)
         return self._protocol
@@ -87,6 +87,16 @@ def test_filter_products_of_interest(product_id, bus, hidpp_short, hidpp_long, e
         assert receiver_info["product_id"]
 
 
+def test_get_known_device_info_matches_known_device_ids():
+    for record in base.KNOWN_DEVICE_IDS:
+        bus_id, product_id = record["bus_id"], record["product_id"]
+        expected = next(r for r in base.KNOWN_DEVICE_IDS if base._match_device(r, bus_id, LOGITECH_VENDOR_ID, product_id))
+
+        assert base.get_known_device_info(int(bus_id), LOGITECH_VENDOR_ID, product_id) is expected
+
+    assert base.get_known_device_info(BusID.USB, LOGITECH_VENDOR_ID + 1, 0xC07D) is None
+
+
 def test_match():
     record = {"vendor_id": LOGITECH_VENDOR_ID}
 
@@ -105,6 +115,7 @@ def test_match():
         (0x1, 0x00, 0x70, False),
         (0x20, 0x09, 0x71, False),
         (0x1, 0x37, 0x71, False),
+        (0x11, 0x05, 0x21, True),  # reply to the Linux HID++ driver
     ],
 )
 def test_make_notification(report_id, sub_id, address, valid_notification):
@@ -168,6 +179,87 @@ def test_request_errors(
             assert result == (error_code if return_error else None)
 
 
+def test_request_many_out_of_order():
+    handle = 0
+    device_number = 1
+    replies = [
+        (base.HIDPP_LONG_MESSAGE_ID, device_number, b"\x01\x13\x00\x20\x00\x03"),  # second request
+        (HIDPP_SHORT_MESSAGE_ID, device_number, b"\x00\x00\x00\x00\x00"),  # something else
+        (base.HIDPP_LONG_MESSAGE_ID, device_number, b"\xff\x02\x14\x05"),  # third request fails
+        (base.HIDPP_LONG_MESSAGE_ID, device_number, b"\x01\x12\x00\x01\x00\x01"),  # first request
+    ]
+
+    with mock.patch("logitech_receiver.base._read", side_effect=replies), mock.patch(
+        "logitech_receiver.base._read_input_buffer"
+    ), mock.patch("logitech_receiver.base.write", return_value=None) as write, mock.patch(
+        "logitech_receiver.base._get_next_sw_id", side_effect=[2, 3, 4]
+    ):
+        with pytest.raises(exceptions.FeatureCallError) as context:
+            base.request_many(handle, device_number, [(0x0110, 1), (0x0110, 2), (0x0210,)], protocol=4.5)
+
+    assert context.value.error == Hidpp20Error.LOGITECH_ERROR
+    assert context.value.request == 0x0214
+    assert context.value.replies == [b"\x00\x01\x00\x01", b"\x00\x20\x00\x03", None]
+    assert [c[0][2] for c in write.call_args_list] == [b"\x01\x12\x01", b"\x01\x13\x02", b"\x02\x14"]
+
+
+def test_request_many_register_errors():
+    handle = 0
+    device_number = 1
+    replies = [
+        (HIDPP_SHORT_MESSAGE_ID, device_number, b"\x8f\x81\x00\x02"),  # first request fails
+        (HIDPP_SHORT_MESSAGE_ID, device_number, b"\x81\x01\x00\x10\x00"),
+    ]
+
+    with mock.patch("logitech_receiver.base._read", side_effect=replies), mock.patch(
+        "logitech_receiver.base._read_input_buffer"
+    ), mock.patch("logitech_receiver.base.write", return_value=None):
+        result = base.request_many(handle, device_number, [(0x8100,), (0x8101,)])
+
+    assert result == [None, b"\x00\x10\x00"]
+
+
+def test_request_many_register_parameter_errors():
+    handle = 0
+    device_number = 0xFF
+    written = []
+
+    def read(handle, timeout):  # a receiver that answers the latest request first, failing for the second slot
+        if written:
+            data = written.pop()
+            if data[2:3] == b"\x21":
+                return HIDPP_SHORT_MESSAGE_ID, device_number, b"\x8f" + data[:2] + b"\x02"
+            return base.HIDPP_LONG_MESSAGE_ID, device_number, data[:3] + b"\x00" * 15
+
+    with mock.patch("logitech_receiver.base._read", side_effect=read), mock.patch(
+        "logitech_receiver.base._read_input_buffer"
+    ), mock.patch("logitech_receiver.base.write", side_effect=lambda h, d, data, long: written.append(data)), mock.patch(
+        "logitech_receiver.base.request", return_value=None
+    ) as request:
+        result = base.request_many(handle, device_number, [(0x83B5, 0x20), (0x83B5, 0x21)])
+
+    assert result == [b"\x20" + b"\x00" * 15, None]
+    request.assert_not_called()
+
+
+@pytest.mark.parametrize("request_id, retried", [(0x8100, True), (0x83B5, False)])
+def test_request_many_long_register_patience(request_id, retried):
+    handle = 0
+    device_number = 0xFF
+    reply = (base.HIDPP_LONG_MESSAGE_ID, device_number, struct.pack("!H", request_id) + b"\x00" * 16)
+    clock = iter([0.0, base._RECEIVER_REQUEST_TIMEOUT * 1.5, base._RECEIVER_REQUEST_TIMEOUT * 1.5])
+
+    with mock.patch("logitech_receiver.base._read", side_effect=[None, reply]), mock.patch(
+        "logitech_receiver.base._read_input_buffer"
+    ), mock.patch("logitech_receiver.base.write", return_value=None), mock.patch(
+        "logitech_receiver.base.time", side_effect=lambda: next(clock)
+    ), mock.patch("logitech_receiver.base.request", return_value=b"retried") as request:
+        result = base.request_many(handle, device_number, [(request_id, 0x00)])
+
+    assert request.called == retried
+    assert result == [b"retried" if retried else b"\x00" * 16]
+
+
 @pytest.mark.skipif(sys.platform == "darwin", reason="Test only runs on Linux")
 @pytest.mark.parametrize(
     "simulated_error, expected_result",
@@ -198,3 +290,12 @@ def test_ping_errors(simulated_error: Hidpp10Error, expected_result):
         else:
             result = base.ping(handle=handle, devnumber=device_number)
             assert result == expected_result
+
+
+def test_close_drops_handle_lock():
+    handle = mock.Mock()
+    lock = base.handle_lock(handle)
+
+    assert base.handles_lock[handle] is lock
+    assert base.close(handle)
+    assert handle not in base.handles_lock
@@ -14,6 +14,8 @@
 ## with this program; if not, write to the Free Software Foundation, Inc.,
 ## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 
+import gc
+
 from dataclasses import dataclass
 from functools import partial
 from typing import Optional
@@ -23,8 +25,11 @@ import pytest
 from logitech_receiver import common
 from logitech_receiver import device
 from logitech_receiver import hidpp20
+from logitech_receiver import presence
 from logitech_receiver.common import BatteryLevelApproximation
 from logitech_receiver.common import BatteryStatus
+from logitech_receiver.hidpp20_constants import SupportedFeature
+from solaar import cache
 
 from . import fake_hidpp
 
@@ -43,6 +48,10 @@ class LowLevelInterfaceFake:
         func = partial(fake_hidpp.request, self.responses)
         return func(response, *args, **kwargs)
 
+    def request_many(self, response, *args, **kwargs):
+        func = partial(fake_hidpp.request_many, self.responses)
+        return func(response, *args, **kwargs)
+
     def ping(self, response, *args, **kwargs):
         func = partial(fake_hidpp.ping, self.responses)
         return func(response, *args, **kwargs)
@@ -258,6 +267,185 @@ def test_device_ids(number, info, responses, handle, unitId, modelId, task_id, k
     assert test_device.polling_rate == rate
 
 
+def test_device_registry(monkeypatch):
+    registry = device.DeviceRegistry()
+    monkeypatch.setattr(device.Device, "registry", registry)
+    responses = fake_hidpp.replace_number(fake_hidpp.r_mouse_3, 6)
+    test_device = device.Device(LowLevelInterfaceFake(responses), FakeReceiver(), 6, True, pi_DDDD, handle=0x11)
+
+    assert registry.find("1234") is test_device
+    assert registry.find("12345679") is test_device  # unit ID is read and indexed when not known
+    assert "12345679" in registry._index
+    assert registry.find("nothing") is None
+
+    test_device.online = False
+    assert registry.find("1234") is None
+    registry.remove(test_device)
+    assert len(registry) == 0
+
+    registry.add(test_device)
+    assert len(registry) == 1
+    del test_device
+    gc.collect()
+    assert len(registry) == 0
+    assert registry._index == {}
+
+
+def test_device_presence(mocker):
+    low_level = LowLevelInterfaceFake(fake_hidpp.r_empty)
+    test_device = device.create_device(low_level, di_CCCC)
+    changes = []
+
+    def changed(dev, online):
+        changes.append((dev, online))
+
+    presence.subscribe(changed)
+    ping = mocker.spy(low_level, "ping")
+
+    try:
+        assert test_device.online
+        assert presence.check(test_device)  # heard from when it was created
+        assert ping.call_count == 0
+
+        test_device._heard -= presence.STALE_AFTER + 1
+        assert presence.check(test_device)
+        assert ping.call_count == 1
+
+        test_device.online = False
+        test_device.online = False
+        assert not presence.check(test_device)
+        assert ping.call_count == 1
+        assert changes == [(test_device, False)]
+    finally:
+        presence.unsubscribe(changed)
+
+
+def test_device_presence_request_many():
+    low_level = LowLevelInterfaceFake(fake_hidpp.r_empty + [fake_hidpp.Response("0102", 0x0400)])
+    test_device = device.create_device(low_level, di_CCCC)
+    test_device._heard -= presence.STALE_AFTER + 1
+
+    assert test_device.request_many([(0x0410,)]) == [None]
+    assert presence.stale(test_device)
+
+    assert test_device.request_many([(0x0410,), (0x0400,)]) == [None, b"\x01\x02"]
+    assert not presence.stale(test_device)  # the device answered a pipelined request
+
+
+@pytest.fixture
+def device_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_file_path", str(tmp_path / "devices.json"))
+    monkeypatch.setattr(cache, "_cache", None)
+    monkeypatch.setattr(common, "device_cache", cache)
+    yield cache
+
+
+def firmware_responses(firmware, entity=0):  # the DEVICE_FW_VERSION responses of r_mouse_3 with one entity changed
+    responses = [r for r in fake_hidpp.r_mouse_3 if r.id in (0x0400, 0x0410) and r.params != f"{entity:02X}"]
+    return responses + [fake_hidpp.Response(firmware, 0x0410, f"{entity:02X}")]
+
+
+@pytest.mark.parametrize(
+    "firmware, entity, expected_cached", [("0141424302030100", 0, True), ("0141424302040100", 0, False), ("0242", 1, False)]
+)
+def test_device_snapshot(device_cache, firmware, entity, expected_cached):
+    responses = fake_hidpp.replace_number(fake_hidpp.r_mouse_3, 6)
+    low_level = LowLevelInterfaceFake(responses)
+    test_device = device.Device(low_level, FakeReceiver(), 6, True, pi_DDDD, handle=0x11)
+    name, firmware_info = test_device.name, test_device.firmware
+    assert test_device.unitId == "12345679"
+
+    responses = [fake_hidpp.Response(4.5, 0x0010)] + firmware_responses(firmware, entity)  # only ping and firmware
+    low_level = LowLevelInterfaceFake(fake_hidpp.replace_number(responses, 6))
+    test_device = device.Device(low_level, FakeReceiver(), 6, True, pi_DDDD, handle=0x11)
+
+    assert (test_device.name == name) == expected_cached
+    assert (test_device.firmware == firmware_info) == expected_cached
+    assert (test_device.unitId == "12345679") == expected_cached
+    assert (test_device.modelId == "123456780000") == expected_cached
+
+
+def test_device_churn(device_cache, monkeypatch):
+    monkeypatch.setattr(cache, "max_entries", 5)
+    registry = device.DeviceRegistry()
+    monkeypatch.setattr(device.Device, "registry", registry)
+    responses = fake_hidpp.replace_number(fake_hidpp.r_mouse_3, 6)
+
+    for i in range(50):  # a long run of devices that come and go
+        pairing_info = dict(pi_DDDD, serial=f"{i:08X}")
+        test_device = device.Device(LowLevelInterfaceFake(responses), FakeReceiver(), 6, True, pairing_info, handle=0x11)
+        assert test_device.firmware
+        test_device.close()
+    key = cache.device_key(test_device)
+    del test_device
+    gc.collect()
+
+    assert len(registry) == 0
+    assert len(cache._cache["devices"]) == 5
+    assert len(cache._cache["features"]) == 5
+    assert len(cache._cache[cache._KEY_SEEN]) == 5
+    assert key in cache._cache["devices"]
+
+    cache._cache[cache._KEY_SEEN][key] -= cache.max_age + 1
+    cache.put("devices", "new", {})
+    assert key not in cache._cache["devices"]
+    assert key not in cache._cache["features"]
+
+
+def test_device_forget(device_cache):
+    responses = fake_hidpp.replace_number(fake_hidpp.r_mouse_3, 6)
+    test_device = device.Device(LowLevelInterfaceFake(responses), FakeReceiver(), 6, True, pi_DDDD, handle=0x11)
+    assert test_device.firmware
+    key = cache.device_key(test_device)
+    assert cache.get("devices", key)
+
+    test_device.forget()
+
+    assert cache.get("devices", key) is None
+    assert cache.get("features", key) is None
+
+
+@pytest.mark.parametrize("firmware, expected_same", [("0141424302030100", True), ("0141424302040100", False)])
+def test_device_rebind(device_cache, firmware, expected_same, mocker):
+    device_info = DeviceInfoStub("11", product_id="DDDD", bus_id=0x0005)
+    test_device = device.create_device(LowLevelInterfaceFake(fake_hidpp.r_mouse_3), device_info)
+    assert test_device.features.fingerprint() == "03" + "0141424302030100" + "0241" + "05"  # count and each entity
+    count = test_device.features.count
+    test_device.close()
+
+    responses = [fake_hidpp.Response(4.5, 0x0010)] + firmware_responses(firmware)  # only ping and firmware
+    test_device.low_level = LowLevelInterfaceFake(responses)
+    spy_request = mocker.spy(test_device.low_level, "request")
+    spy_request_many = mocker.spy(test_device.low_level, "request_many")
+    spy_ping = mocker.spy(test_device.low_level, "ping")
+
+    assert test_device.rebind(0x11, DeviceInfoStub("12", product_id="DDDD", bus_id=0x0005)) == expected_same
+    assert test_device.path == "12"
+    assert spy_ping.call_count == 1
+    assert spy_request.call_count == 0
+    assert spy_request_many.call_count == 1  # all the firmware in one pipelined pass
+    if expected_same:
+        assert test_device.features.count == count
+        assert test_device in list(device.Device.registry)
+
+
+@pytest.mark.parametrize("extra_features, expected_same", [(0, True), (1, False)])
+def test_device_rebind_without_firmware(extra_features, expected_same, mocker):
+    device_info = DeviceInfoStub("11", product_id="DDDD", bus_id=0x0005)
+    test_device = device.create_device(LowLevelInterfaceFake(fake_hidpp.r_mouse_3), device_info)
+    assert test_device.features  # read without a cache, so the firmware isn't
+    fs_index = test_device.features[SupportedFeature.FEATURE_SET]
+    count = test_device.features.count
+    test_device.close()
+
+    responses = [fake_hidpp.Response(4.5, 0x0010), fake_hidpp.Response(f"{count - 1 + extra_features:02X}", fs_index << 8)]
+    test_device.low_level = LowLevelInterfaceFake(responses)
+    spy_request = mocker.spy(test_device.low_level, "request")
+
+    assert test_device.rebind(0x11, DeviceInfoStub("12", product_id="DDDD", bus_id=0x0005)) == expected_same
+    assert spy_request.call_count == 1
+
+
 class FakeDevice(device.Device):  # a fully functional Device but its HID++ functions look at local data
     def __init__(self, responses, *args, **kwargs):
         self.responses = responses
@@ -267,6 +455,54 @@ class FakeDevice(device.Device):  # a fully functional Device but its HID++ func
     ping = fake_hidpp.Device.ping
 
 
+def test_device_led_effects_snapshot(device_cache, mocker):
+    firmware = [  # DEVICE_FW_VERSION at 0x0A, which validates the snapshot
+        fake_hidpp.Response("00030000", 0x0110, "0A"),
+        fake_hidpp.Response("0A0001", 0x0000, "0003"),
+        fake_hidpp.Response("01", 0x0A00),  # one firmware entity
+        fake_hidpp.Response("0141424302030100", 0x0A10, "00"),
+    ]
+    test_device = FakeDevice(fake_hidpp.complex_responses_2 + firmware, None, None, True, device_info=di_B530)
+    test_device._protocol = 4.5
+    led_effects = test_device.led_effects
+
+    test_device = FakeDevice(fake_hidpp.complex_responses_2 + firmware, None, None, True, device_info=di_B530)
+    test_device._protocol = 4.5
+    spy_request = mocker.spy(test_device, "request")
+    cached_effects = test_device.led_effects
+
+    assert device_cache.get("devices", device_cache.device_key(test_device))["led_effects"]["zones"]
+    assert type(cached_effects) is type(led_effects)
+    assert str(cached_effects) == str(led_effects)
+    assert all(call[0][0] >> 8 != 0x07 for call in spy_request.call_args_list)  # nothing asked of RGB_EFFECTS
+
+
+def test_device_keys_snapshot(device_cache, mocker):
+    firmware = [  # DEVICE_FW_VERSION at 0x0A, which validates the snapshot
+        fake_hidpp.Response("00030000", 0x0110, "0A"),
+        fake_hidpp.Response("0A0001", 0x0000, "0003"),
+        fake_hidpp.Response("01", 0x0A00),  # one firmware entity
+        fake_hidpp.Response("0141424302030100", 0x0A10, "00"),
+    ]
+    test_device = FakeDevice(fake_hidpp.complex_responses_2 + firmware, None, None, True, device_info=di_B530)
+    test_device._protocol = 4.5
+    keys = list(test_device.keys)
+
+    test_device = FakeDevice(fake_hidpp.complex_responses_2 + firmware, None, None, True, device_info=di_B530)
+    test_device._protocol = 4.5
+    spy_request = mocker.spy(test_device, "request")
+    spy_request_many = mocker.spy(test_device, "request_many")
+    cached_keys = test_device.keys
+
+    assert len(device_cache.get("devices", device_cache.device_key(test_device))["keys"]) == len(keys)
+    assert [(k.index, k.key, k.default_task, k.flags, k.pos, k.group) for k in cached_keys] == [
+        (k.index, k.key, k.default_task, k.flags, k.pos, k.group) for k in keys
+    ]
+    asked = [call[0][0] for call in spy_request.call_args_list]
+    asked += [r[0] for call in spy_request_many.call_args_list for r in call[0][0]]
+    assert 0x0510 not in asked  # the keys came from the snapshot
+
+
 @pytest.mark.parametrize(
     "device_info, responses, protocol, led, keys, remap, gestures, backlight, profiles",
     [
@@ -355,3 +591,21 @@ def test_device_battery(device_info, responses, protocol, expected_battery, chan
     assert test_device.battery() == expected_battery
     test_device.read_battery()
     spy_changed.assert_called_with(**changed)
+
+
+@pytest.mark.parametrize(
+    "cookie, push, applied, expected_applied",
+    [(0x11, False, True, 1), (0x00, False, True, 2), (None, False, True, 2), (0x11, True, True, 2), (0x11, False, False, 2)],
+)
+def test_device_reconnect_kept_settings(cookie, push, applied, expected_applied, mocker):
+    mocker.patch("solaar.configuration.persister", return_value={})
+    test_device = FakeDevice(fake_hidpp.r_keyboard_2, None, None, True, device_info=di_B530)
+    test_device._protocol = 4.5
+    mocker.patch.object(device._hidpp20, "get_configuration_cookie", return_value=cookie)
+    spy_apply = mocker.patch("logitech_receiver.settings.apply_all_settings", return_value=applied)
+
+    test_device.changed(active=True)
+    test_device.changed(active=False)
+    test_device.changed(active=True, push=push)
+
+    assert spy_apply.call_count == expected_applied
@@ -25,6 +25,7 @@ from logitech_receiver import special_keys
 from logitech_receiver.hidpp20 import KeyFlag
 from logitech_receiver.hidpp20 import MappingFlag
 from logitech_receiver.hidpp20_constants import GestureId
+from solaar import cache
 
 from . import fake_hidpp
 
@@ -136,6 +137,126 @@ def test_FeaturesArray_delitem():
         del featuresarray[5]
 
 
+def test_FeaturesArray_read_all():
+    device = fake_hidpp.Device(
+        "COMPLETE",
+        True,
+        4.5,
+        [
+            fake_hidpp.Response("010001", 0x0000, "0001"),  # FEATURE SET at x01
+            fake_hidpp.Response("02", 0x0100),  # 2 features
+            fake_hidpp.Response("00010001", 0x0110, "01"),  # FEATURE SET at x01
+            fake_hidpp.Response("1B040203", 0x0110, "02"),  # REPROG_CONTROLS_V4 at x02
+        ],
+    )
+    featuresarray = hidpp20.FeaturesArray(device)
+
+    assert bool(featuresarray)
+    assert featuresarray.complete
+    assert len(featuresarray.inverse) == 3
+    assert featuresarray.inverse[2] == hidpp20_constants.SupportedFeature.REPROG_CONTROLS_V4
+    assert featuresarray.get_feature_version(hidpp20_constants.SupportedFeature.REPROG_CONTROLS_V4) == 3
+    assert featuresarray.get_flags(hidpp20_constants.SupportedFeature.REPROG_CONTROLS_V4) == 2
+    device.responses = []  # everything else is answered from the table
+    assert hidpp20_constants.SupportedFeature.GESTURE_2 not in featuresarray
+    assert featuresarray.get_feature(3) is None
+    assert list(featuresarray.enumerate()) == [
+        (hidpp20_constants.SupportedFeature.ROOT, 0),
+        (hidpp20_constants.SupportedFeature.FEATURE_SET, 1),
+        (hidpp20_constants.SupportedFeature.REPROG_CONTROLS_V4, 2),
+    ]
+
+
+def test_FeaturesArray_read_all_error(mocker):
+    device = fake_hidpp.Device(
+        "ERROR",
+        True,
+        4.5,
+        [
+            fake_hidpp.Response("010001", 0x0000, "0001"),  # FEATURE SET at x01
+            fake_hidpp.Response("03", 0x0100),  # 3 features
+        ],
+    )
+    error = exceptions.FeatureCallError(number=1, request=0x0110, error=hidpp20_constants.ErrorCode.INVALID_ARGUMENT)
+    error.replies = [bytes.fromhex("00010001"), bytes.fromhex("1B040203"), None]
+    mocker.patch.object(device, "request_many", side_effect=error)
+    featuresarray = hidpp20.FeaturesArray(device)
+
+    assert bool(featuresarray)
+    assert not featuresarray.complete  # the feature at x03 is read when looked up
+    assert featuresarray.inverse[2] == hidpp20_constants.SupportedFeature.REPROG_CONTROLS_V4
+
+
+@pytest.fixture
+def features_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_file_path", str(tmp_path / "devices.json"))
+    monkeypatch.setattr(cache, "_cache", None)
+    monkeypatch.setattr(common, "device_cache", cache)
+    yield cache
+
+
+responses_cached = [
+    fake_hidpp.Response("010001", 0x0000, "0001"),  # FEATURE SET at x01
+    fake_hidpp.Response("08", 0x0100),  # 8 features
+    fake_hidpp.Response("00010001", 0x0110, "01"),  # FEATURE SET at x01
+    fake_hidpp.Response("00050000", 0x0110, "02"),  # DEVICE_NAME at x02
+    fake_hidpp.Response("00030002", 0x0110, "03"),  # DEVICE_FW_VERSION at x03
+    fake_hidpp.Response("00200000", 0x0110, "04"),  # CONFIG_CHANGE at x04
+    fake_hidpp.Response("10000000", 0x0110, "05"),  # BATTERY_STATUS at x05
+    fake_hidpp.Response("1D4B0000", 0x0110, "06"),  # WIRELESS_DEVICE_STATUS at x06
+    fake_hidpp.Response("22010000", 0x0110, "07"),  # ADJUSTABLE_DPI at x07
+    fake_hidpp.Response("21210000", 0x0110, "08"),  # HIRES_WHEEL at x08
+    fake_hidpp.Response("01", 0x0300),  # 1 firmware entity
+    fake_hidpp.Response("0052514D1201002200", 0x0310, "00"),  # firmware entity 0
+]
+
+
+@pytest.mark.parametrize(
+    "firmware, expected_cached, expected_kept",
+    [
+        ("0052514D1201002200", True, True),
+        ("0052514D1301002200", False, False),
+        (None, False, True),  # the firmware couldn't be read, so the entry may still be good
+    ],
+)
+def test_FeaturesArray_cached(features_cache, firmware, expected_cached, expected_kept, mocker):
+    spy_put = mocker.spy(features_cache, "put")
+    device = fake_hidpp.Device("CACHED", True, 4.5, responses_cached)
+    device._serial = "12345678"
+    featuresarray = hidpp20.FeaturesArray(device)
+    assert featuresarray[hidpp20_constants.SupportedFeature.DEVICE_FW_VERSION] == 3
+    assert hidpp20_constants.SupportedFeature.REPROG_CONTROLS_V4 not in featuresarray
+    assert spy_put.call_count == 1  # stored once when the table was read, not on each lookup
+
+    responses2 = [fake_hidpp.Response("01", 0x0300), fake_hidpp.Response(firmware, 0x0310, "00")]
+    device2 = fake_hidpp.Device("CACHED", True, 4.5, responses2)
+    device2._serial = "12345678"
+    featuresarray2 = hidpp20.FeaturesArray(device2)
+
+    assert bool(featuresarray2) == expected_cached
+    assert (featuresarray2[hidpp20_constants.SupportedFeature.DEVICE_FW_VERSION] == 3) == expected_cached
+    assert hidpp20_constants.SupportedFeature.REPROG_CONTROLS_V4 not in featuresarray2
+    assert (features_cache.get("features", "0000:12345678") is not None) == expected_kept
+
+
+def test_FeaturesArray_cached_when_complete(features_cache, mocker):
+    spy_put = mocker.spy(features_cache, "put")
+    responses = [r for r in responses_cached if r.params not in ("05", "06")]  # two features read one at a time
+    device = fake_hidpp.Device("CACHED", True, 4.5, responses)
+    device._serial = "12345678"
+    featuresarray = hidpp20.FeaturesArray(device)
+    assert featuresarray
+    assert not featuresarray.complete
+    assert spy_put.call_count == 1
+
+    device.responses = responses_cached
+    assert featuresarray.get_feature(5) == hidpp20_constants.SupportedFeature.BATTERY_STATUS
+    assert spy_put.call_count == 1
+    assert featuresarray.get_feature(6) == hidpp20_constants.SupportedFeature.WIRELESS_DEVICE_STATUS
+    assert featuresarray.complete
+    assert spy_put.call_count == 2
+
+
 @pytest.mark.parametrize(
     "device, expected0, expected1, expected2, expected1v",
     [(device_zerofeatures, None, None, None, None), (device_standard, 0, 5, None, 3)],
@@ -465,6 +586,61 @@ def test_keys_array_v4_key(key, expected_index, expected_mapped_to, expected_rem
         assert list(remappable_to) == expected_remappable_to
 
 
+def test_keys_array_v4_read_all(mocker):
+    device = fake_hidpp.Device(
+        "KEY", responses=fake_hidpp.responses_key, feature=hidpp20_constants.SupportedFeature.REPROG_CONTROLS_V4, offset=5
+    )
+    device._keys = _hidpp20.get_keys(device)
+    spy_request_many = mocker.spy(device, "request_many")
+
+    keys = list(device._keys)
+
+    assert len(spy_request_many.call_args_list) == 2
+    assert [r[0] for r in spy_request_many.call_args_list[0][0][0]] == [0x510] * 8
+    assert [r[0] for r in spy_request_many.call_args_list[1][0][0]] == [0x520] * 8
+    spy_request = mocker.spy(device, "request")
+    assert [int(k.mapped_to) for k in keys] == [0x50, 0x51, 0x50, 0x53, 0x56, 0xC3, 0x50, 0x51]
+    spy_request.assert_not_called()
+
+
+def test_keys_array_v4_query_reporting(mocker):
+    device = fake_hidpp.Device(
+        "KEY", responses=fake_hidpp.responses_key, feature=hidpp20_constants.SupportedFeature.REPROG_CONTROLS_V4, offset=5
+    )
+    device._keys = _hidpp20.get_keys(device)
+    keys = [device._keys[i] for i in range(len(device._keys))]  # one at a time, without their reporting
+    spy_request_many = mocker.spy(device, "request_many")
+
+    device._keys.query_reporting()
+
+    assert [[r[0] for r in call[0][0]] for call in spy_request_many.call_args_list] == [[0x520] * 8]
+    spy_request = mocker.spy(device, "request")
+    assert [int(k.mapped_to) for k in keys] == [0x50, 0x51, 0x50, 0x53, 0x56, 0xC3, 0x50, 0x51]
+    spy_request.assert_not_called()
+
+
+def test_keys_array_v4_lookups_cached(mocker):
+    responses = fake_hidpp.responses_key + [fake_hidpp.Response("0050000051", 0x530, "0050000051")]
+    device = fake_hidpp.Device(
+        "KEY", responses=responses, feature=hidpp20_constants.SupportedFeature.REPROG_CONTROLS_V4, offset=5
+    )
+    device._keys = _hidpp20.get_keys(device)
+    key = device._keys[0]
+    remappable_to = key.remappable_to
+    spy_request = mocker.spy(device, "request")
+
+    assert device._keys.index(special_keys.CONTROL.Forward_Button) == 4
+    assert device._keys.index(special_keys.CONTROL.Next) is None
+    assert key.remappable_to is remappable_to
+    spy_request.assert_not_called()
+
+    key.remap(special_keys.CONTROL.Right_Button)
+
+    assert key.mapped_to == 0x51
+    assert key.remappable_to is not remappable_to
+    assert list(key.remappable_to) == list(remappable_to)
+
+
 @pytest.mark.parametrize(
     "device, index", [(device_zerofeatures, -1), (device_zerofeatures, 5), (device_standard, -1), (device_standard, 6)]
 )
@@ -498,6 +674,19 @@ def test_KeysArrayPersistent_key(responses, key, index, mapped_to, capabilities)
     assert device._remap_keys.capabilities == capabilities
 
 
+def test_KeysArrayPersistent_read_all(mocker):
+    device = fake_hidpp.Device(
+        "REMAP", responses=fake_hidpp.responses_remap, feature=hidpp20_constants.SupportedFeature.PERSISTENT_REMAPPABLE_ACTION
+    )
+    device._remap_keys = _hidpp20.get_remap_keys(device)
+    spy_request_many = mocker.spy(device, "request_many")
+
+    device._remap_keys._ensure_all_keys_queried()
+
+    assert [{r[0] & 0xFF for r in call[0][0]} for call in spy_request_many.call_args_list] == [{0x20}, {0x30}]
+    assert device._remap_keys[2].remapped == common.NamedInt(0x51, "DOWN")
+
+
 @pytest.mark.parametrize(
     "id, length, minimum, maximum, widget, min, max, wid, string",
     [
@@ -606,6 +795,32 @@ def test_spec(responses, id, s, byte_count, expected_value, expected_string):
     assert repr(spec) == expected_string
 
 
+def test_Gestures_state(mocker):
+    device = fake_hidpp.Device(
+        "GESTURES", responses=fake_hidpp.responses_gestures, feature=hidpp20_constants.SupportedFeature.GESTURE_2
+    )
+    spy_request_many = mocker.spy(device, "request_many")
+    gestures = _hidpp20.get_gestures(device)
+    spy_request = mocker.spy(device, "request")
+
+    assert [call[0][0][0][0] >> 8 for call in spy_request_many.call_args_list].count(4) == 1  # one batch to GESTURE_2
+    assert [(g.enabled(), g.diverted()) for g in gestures.gestures.values() if g.id in (1, 45)] == [
+        (True, False),
+        (False, None),
+    ]
+    assert gestures.params[4].value == 256
+    assert gestures.params[4].default_value == 256
+    spec_values = [s.value for s in gestures.specs.values()]
+    spy_request.assert_not_called()
+    assert spec_values == [s.read() for s in gestures.specs.values()]
+
+    gestures.enable_gesture(45)
+    gestures.params[4].write(bytes.fromhex("0180"))
+
+    assert gestures.gesture_enabled(45) is True
+    assert gestures.params[4].value == 0x0180
+
+
 def test_Gestures():
     device = fake_hidpp.Device(
         "GESTURES", responses=fake_hidpp.responses_gestures, feature=hidpp20_constants.SupportedFeature.GESTURE_2
@@ -817,6 +1032,14 @@ def test_button_bytes(hex, expected_behavior, sector, address, typ, val, modifie
     assert yaml.safe_load(yaml.dump(button)).to_bytes().hex().upper() == hex
 
 
+def test_button_fields():
+    button = yaml.safe_load("!Button {behavior: 8, type: 2, modifiers: 4, value: 0x54, unknown: 1}")
+
+    assert button.as_dict() == {"behavior": 8, "type": 2, "modifiers": 4, "value": 0x54}
+    assert not hasattr(button, "__dict__")
+    assert repr(button) == "Button{behavior:8, type:2, modifiers:4, value:84}"
+
+
 hex1 = (
     "01010290018003000700140028FFFFFF"
     "FFFF0000000000000000000000000000"
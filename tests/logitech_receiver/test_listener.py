@@ -0,0 +1,36 @@
+from logitech_receiver import base
+from logitech_receiver import exceptions
+from logitech_receiver import listener
+
+
+def test_events_listener_late_stop_after_rebind(mocker):
+    device = mocker.Mock(path="/dev/hidraw1", handle=3, isDevice=False)
+    events_listener = listener.EventsListener(device, mocker.Mock())
+    closed = mocker.patch.object(base, "close")
+
+    def read(handle, timeout):  # the device comes back on a new node while the listener is still reading the old one
+        device.handle = 7
+        raise exceptions.NoReceiver()
+
+    mocker.patch.object(base, "read", side_effect=read)
+
+    events_listener.run()
+
+    assert events_listener.rebound()
+    device.close.assert_not_called()
+    events_listener._handle.close()
+    closed.assert_called_once_with(3)
+
+
+def test_events_listener_stop(mocker):
+    device = mocker.Mock(path="/dev/hidraw1", handle=3, isDevice=False)
+    events_listener = listener.EventsListener(device, mocker.Mock())
+    closed = mocker.patch.object(base, "close")
+    mocker.patch.object(base, "read", side_effect=exceptions.NoReceiver())
+
+    events_listener.run()
+
+    assert not events_listener.rebound()
+    device.close.assert_called_once_with()
+    events_listener._handle.close()  # what closing the device does
+    closed.assert_called_once_with(3)
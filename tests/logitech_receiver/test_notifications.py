@@ -1,6 +1,7 @@
 import pytest
 
 from logitech_receiver import notifications
+from logitech_receiver import presence
 from logitech_receiver.base import HIDPPNotification
 from logitech_receiver.common import Notification
 from logitech_receiver.hidpp10_constants import BoltPairingError
@@ -25,6 +26,9 @@ class MockLowLevelInterface:
     def request(self, handle, devnumber, request_id, *params, **kwargs):
         pass
 
+    def request_many(self, handle, devnumber, requests, **kwargs):
+        return [None] * len(requests)
+
     def find_paired_node(self, receiver_path: str, index: int, timeout: int):
         return None
 
@@ -78,6 +82,17 @@ def test_process_device_notification(hidpp_notification, expected):
     assert result == expected
 
 
+def test_process_device_notification_heard(mocker):
+    device = fake_hidpp.Device()
+    device._heard = None
+    device.receiver = mocker.MagicMock()
+    notification = HIDPPNotification(0, 0, sub_id=Notification.POWER, address=0x01, data=b"0x01")
+
+    notifications.process_device_notification(device, notification)
+
+    assert not presence.stale(device)
+
+
 @pytest.mark.parametrize(
     "hidpp_notification, expected",
     [
@@ -126,13 +141,16 @@ def test_process_hidpp10_custom_notification(hidpp_notification, expected):
         (HIDPPNotification(0, 0, sub_id=Notification.PAIRING_LOCK, address=0x01, data=b"0x01"), None),
     ],
 )
-def test_process_hidpp10_notification(hidpp_notification, expected):
+def test_process_hidpp10_notification(hidpp_notification, expected, mocker):
     fake_device = fake_hidpp.Device()
-    fake_device.receiver = ["rec1", "rec2"]
+    fake_device.receiver = mocker.MagicMock()
+    fake_device.receiver.__contains__.return_value = False
 
     result = notifications._process_hidpp10_notification(fake_device, hidpp_notification)
 
     assert result == expected
+    if hidpp_notification.sub_id == Notification.CONNECT_DISCONNECT and hidpp_notification.address == 0x02:
+        fake_device.receiver.slot_unpaired.assert_called_once_with(fake_device.number)
 
 
 @pytest.mark.parametrize(
@@ -306,6 +324,19 @@ def test_process_device_notification_extended(mocker, sub_id, notification_data,
     assert result == expected
 
 
+def test_process_driver_reply(mocker):
+    device = mocker.Mock()
+    device.handle_notification.return_value = None
+    device.protocol = 4.5
+    device.features.get_feature.return_value = SupportedFeature.HIRES_WHEEL
+    reapply = mocker.patch.object(notifications.settings, "reapply_if_changed")
+    notification = HIDPPNotification(0x11, 0xFF, 0x07, 0x21, b"\x02")  # the driver set the wheel mode
+
+    assert notifications.process_device_notification(device, notification) is True
+    device.features.get_feature.assert_called_once_with(0x07)
+    reapply.assert_called_once_with(device, SupportedFeature.HIRES_WHEEL)
+
+
 def test_handle_device_discovery():
     receiver: Receiver = Receiver(MockLowLevelInterface(), None, {}, True, None, None)
     sub_id = Registers.DISCOVERY_STATUS_NOTIFICATION
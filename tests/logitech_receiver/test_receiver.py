@@ -36,6 +36,10 @@ class LowLevelInterfaceFake:
         func = partial(fake_hidpp.request, self.responses)
         return func(response, *args, **kwargs)
 
+    def request_many(self, response, *args, **kwargs):
+        func = partial(fake_hidpp.request_many, self.responses)
+        return func(response, *args, **kwargs)
+
     def ping(self, response, *args, **kwargs):
         func = partial(fake_hidpp.ping, self.responses)
         return func(response, *args, **kwargs)
@@ -165,6 +169,94 @@ def test_receiver_factory_props(device_info, responses, firmware, codename, rema
     assert r.count() == count
 
 
+def test_receiver_slots_read_ahead(mocker):
+    mock_low_level = LowLevelInterfaceFake(responses_unifying)
+    spy_request_many = mocker.spy(mock_low_level, "request_many")
+
+    r = receiver.create_receiver(mock_low_level, DeviceInfo("11"), lambda x: x)
+    assert spy_request_many.call_count == 0  # only once the slots are needed
+    r.read_slots()
+    spy_request = mocker.spy(mock_low_level, "request")
+
+    assert spy_request_many.call_count == 1
+    assert r._paired == {1, 2, 3}
+    assert r.count() == 3
+    assert r.remaining_pairings() == -1
+    assert r.device_pairing_information(1) == mouse_info
+    assert r.device_codename(2) == "K520"
+    assert spy_request.call_count == 0
+
+    r.slot_unpaired(2)
+    r.slot_unpaired(2)  # from the notification and then from the unpairing
+    assert r.count() == 2
+    r._slot_paired(5)
+    r._slot_paired(6)
+    assert r.count() == 4
+    assert spy_request.call_count == 0
+
+
+def test_receiver_slots_read_when_iterated(mocker):
+    responses = [r for r in responses_unifying if r.id != 0x8102] + [fake_hidpp.Response("000003", 0x8102)]
+    mock_low_level = LowLevelInterfaceFake(responses)
+    spy_request_many = mocker.spy(mock_low_level, "request_many")
+    r = receiver.create_receiver(mock_low_level, DeviceInfo("11"), lambda x: x)
+
+    assert list(r) == []
+
+    assert spy_request_many.call_count == 0  # no devices are paired, so there is nothing to read
+    assert r._slots_read
+    assert r._paired == set()
+
+
+def test_receiver_slots_unknown(mocker):
+    r = receiver.create_receiver(LowLevelInterfaceFake(responses_unifying), DeviceInfo("11"), lambda x: x)
+    r._paired = None  # the pass didn't find all the paired devices
+    spy_request = mocker.spy(r.low_level, "request")
+
+    r._slot_paired(5)
+    assert r.count() == 3  # read again, as the device may have been paired before
+    r.slot_unpaired(1)
+    assert r.count() == 3
+    assert spy_request.call_count == 2
+
+
+@pytest.mark.parametrize("unpaired, expected_count", [(b"\x00", 2), (None, None)])
+def test_receiver_unpair_count(unpaired, expected_count, mocker):
+    r = receiver.create_receiver(LowLevelInterfaceFake(responses_unifying), DeviceInfo("11"), lambda x: x)
+    r.read_slots()
+    r._devices[2] = mocker.MagicMock()
+    mocker.patch.object(type(r), "_unpair_device_per_receiver", return_value=unpaired)
+
+    if unpaired:
+        del r[2]
+    else:
+        with pytest.raises(Exception, match="failed to unpair"):
+            del r[2]
+
+    assert r._count == expected_count  # when the unpairing failed the count is read again
+
+
+def test_receiver_slots_read_ahead_expire(mocker):
+    r = receiver.create_receiver(LowLevelInterfaceFake(responses_unifying), DeviceInfo("11"), lambda x: x)
+    r.read_slots()
+    spy_request = mocker.spy(r.low_level, "request")
+
+    mocker.patch.object(receiver.time, "time", return_value=r._prefetched_at + receiver._PREFETCH_MAX_AGE + 1)
+    assert r.device_codename(2) == "K520"
+    assert spy_request.call_count == 1
+    assert not r._prefetched
+
+
+def test_receiver_pairing_information_settles(mocker):
+    r = receiver.create_receiver(LowLevelInterfaceFake(responses_unifying), DeviceInfo("11"), lambda x: x)
+    missing = exceptions.NoSuchDevice(number=1, receiver=r, error="read pairing information")
+    mocker.patch.object(type(r), "device_pairing_information", side_effect=[missing, missing, mouse_info])
+    sleep = mocker.patch.object(receiver.time, "sleep")
+
+    assert r._settled_pairing_information(1) == mouse_info
+    assert [call.args[0] for call in sleep.call_args_list] == list(receiver._SETTLE_DELAYS[:2])
+
+
 @pytest.mark.parametrize(
     "device_info, responses, status_str, strng",
     [
@@ -18,6 +18,8 @@
 The device uses some methods from the real device to set up data structures that are needed for some tests.
 """
 
+import threading
+
 from dataclasses import dataclass
 from typing import Any
 
@@ -26,6 +28,7 @@ import pytest
 from logitech_receiver import common
 from logitech_receiver import hidpp20
 from logitech_receiver import hidpp20_constants
+from logitech_receiver import settings
 from logitech_receiver import settings_templates
 from logitech_receiver import special_keys
 
@@ -836,6 +839,32 @@ def test_check_feature_settings(test, mocker):
     assert already_known
 
 
+def test_check_feature_settings_only_present_features(mocker):
+    responses = [fake_hidpp.Response("0100", 0x0400), fake_hidpp.Response("0120", 0x0410, "0120")]
+    device = fake_hidpp.Device(responses=responses, feature=hidpp20_constants.SupportedFeature.POINTER_SPEED)
+    spy_check_feature = mocker.spy(settings_templates, "check_feature")
+
+    already_known = []
+    assert settings_templates.check_feature_settings(device, already_known)
+
+    checked = [call.args[1] for call in spy_check_feature.call_args_list]
+    assert checked == settings_templates._FEATURE_SETTINGS[hidpp20_constants.SupportedFeature.POINTER_SPEED]
+    assert [s.name for s in already_known] == ["pointer_speed"]  # speed-change also needs a key to divert
+
+
+def test_check_feature_settings_reads_keys_together(mocker):
+    feature = hidpp20_constants.SupportedFeature.REPROG_CONTROLS_V4
+    device = fake_hidpp.Device(responses=fake_hidpp.responses_key, feature=feature, offset=5)
+    device.persister["_absent"] = [sclass.name for sclass in settings_templates._FEATURE_SETTINGS[feature]]
+    spy_request_many = mocker.spy(device, "request_many")
+
+    assert settings_templates.check_feature_settings(device, [])
+
+    batches = [[r[0] for r in call.args[0]] for call in spy_request_many.call_args_list]
+    assert [b for b in batches if b[0] & 0xFF00 == 0x0500] == [[0x510] * 8, [0x520] * 8]
+    assert all(k._mapped_to is not None for k in device._keys)
+
+
 @pytest.mark.parametrize(
     "test",
     [
@@ -853,3 +882,98 @@ def test_check_feature_setting(test, mocker):
     setting = settings_templates.check_feature_setting(device, tst.sclass.name)
 
     assert setting
+
+
+def test_apply_all_settings_pipelined(mocker):
+    responses = [fake_hidpp.Response("0100", 0x0400), fake_hidpp.Response("0120", 0x0410, "0120")]
+    device = fake_hidpp.Device(responses=responses, feature=hidpp20_constants.SupportedFeature.POINTER_SPEED)
+    device.persister["pointer_speed"] = 0x0120
+    settings_templates.check_feature_settings(device, device.settings)
+    spy_request_many = mocker.spy(device, "request_many")
+    spy_request = mocker.spy(device, "request")
+
+    settings.apply_all_settings(device)
+
+    reads, writes = [call.args[0] for call in spy_request_many.call_args_list]
+    assert [r[0] for r in reads] == [0x0400]  # the range validator checks the current value before writing
+    assert [w[0] for w in writes] == [0x0410]
+    assert spy_request.call_count == 2  # nothing outside the pipelined batches
+    assert device.settings[0]._initial == 0x0100  # what the device had before, see canaries_kept
+    assert device.settings[0]._value == 0x0120
+
+
+def test_apply_all_settings_shared_feature(mocker):
+    device = fake_hidpp.Device(feature=hidpp20_constants.SupportedFeature.HIRES_WHEEL)
+    mode = bytearray(1)  # the wheel mode the fake device keeps
+    fake_request = device.request
+
+    def request(id, *params, **kwargs):
+        if id == 0x0410:
+            return bytes(mode)
+        if id == 0x0420:
+            mode[:] = params[0][:1]
+            return bytes(mode)
+        return fake_request(id, *params, **kwargs)
+
+    mocker.patch.object(device, "request", side_effect=request)
+    sclasses = [settings_templates.HiresSmoothInvert, settings_templates.HiresSmoothResolution, settings_templates.HiresMode]
+    device.settings = [settings_templates.check_feature(device, sclass) for sclass in sclasses]
+    for setting in device.settings:
+        device.persister[setting.name] = True
+
+    assert settings.apply_all_settings(device)
+
+    assert mode == b"\x07"  # each setting changes its own bit of what the one before wrote
+
+
+@pytest.mark.parametrize(
+    "initial, applied, expected_kept",
+    [
+        (0x0080, 0x0100, True),
+        (0x0080, 0x0120, False),
+        (0x0100, 0x0100, False),  # the applied value is what the device had anyway, so a reset would look the same
+        (None, 0x0100, False),
+    ],
+)
+def test_canaries_kept(initial, applied, expected_kept):
+    responses = [fake_hidpp.Response("0100", 0x0400)]
+    device = fake_hidpp.Device(responses=responses, feature=hidpp20_constants.SupportedFeature.POINTER_SPEED)
+    settings_templates.check_feature_settings(device, device.settings)
+    device.settings[0]._initial = initial
+    device.settings[0]._value = applied
+
+    assert settings.canaries_kept(device) == expected_kept
+
+
+def test_write_later_latest_value_wins(mocker):
+    responses = [fake_hidpp.Response("0100", 0x0400)]
+    device = fake_hidpp.Device(responses=responses, feature=hidpp20_constants.SupportedFeature.POINTER_SPEED)
+    settings_templates.check_feature_settings(device, device.settings)
+    setting = device.settings[0]
+    setting.write_interval = 0.01
+    device.persister["pointer_speed"] = 0x0100
+    started = threading.Event()
+    release = threading.Event()
+    done = threading.Event()
+    written = []
+    results = []
+
+    def write(value, save=True):
+        written.append(value)
+        started.set()
+        release.wait(2)
+        return value
+
+    mocker.patch.object(setting, "write", side_effect=write)
+
+    settings.write_later(setting, 0x0100, callback=lambda _s, result: results.append(result))
+    assert started.wait(2)
+    settings.write_later(setting, 0x0110, callback=lambda _s, result: results.append(result))
+    settings.write_later(setting, 0x0120, callback=lambda _s, result: (results.append(result), done.set()))
+    assert setting.read() == 0x0120  # relative changes build on the value queued
+    release.set()
+
+    assert done.wait(2)
+    assert written == [0x0100, 0x0120]  # the value queued while writing was replaced by the latest one
+    assert results == [0x0120]  # no callback for a write that a later value is waiting to replace
+    assert device.persister["pointer_speed"] == 0x0120
@@ -0,0 +1,36 @@
+from solaar import listener
+
+
+def make_listener(mocker, identity):
+    device = mocker.Mock(path="/dev/hidraw1", handle=3, isDevice=True)
+    solaar_listener = listener.SolaarListener(device, mocker.Mock(), identity)
+    solaar_listener._handle = mocker.Mock(path="/dev/hidraw1")
+    listener._all_listeners["/dev/hidraw1"] = solaar_listener
+    return solaar_listener, device
+
+
+def test_has_stopped(mocker):
+    identity = (0x0005, "046D", "B023", "SERIAL1")
+    solaar_listener, device = make_listener(mocker, identity)
+    device.handle = solaar_listener._handle
+
+    solaar_listener.has_stopped()
+
+    assert "/dev/hidraw1" not in listener._all_listeners
+    device.close.assert_called_once_with()
+    assert listener._departed.pop(identity) is device
+    solaar_listener.status_changed_callback.assert_called_once_with(device)
+
+
+def test_has_stopped_after_rebind(mocker):
+    identity = (0x0005, "046D", "B023", "SERIAL2")
+    solaar_listener, device = make_listener(mocker, identity)
+    device.handle, device.path = 7, "/dev/hidraw2"  # back on a new node before the listener stopped
+
+    solaar_listener.has_stopped()
+
+    assert "/dev/hidraw1" not in listener._all_listeners
+    device.close.assert_not_called()
+    solaar_listener._handle.close.assert_called_once_with()
+    assert identity not in listener._departed
+    solaar_listener.status_changed_callback.assert_not_called()